@@ -1,46 +1,706 @@
 import requests
-import pandas as pd
-import spacy
-from bs4 import BeautifulSoup
-from rdflib import Graph, Namespace, RDF, URIRef, Literal
-from rdflib.namespace import RDFS, OWL, XSD
-import cv2
-import pytesseract
-import numpy as np
-from matplotlib import pyplot as plt
-from transformers import pipeline
+from lxml import etree
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
 import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from metrics import get_metrics
+from fileutils import atomic_write
 
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize NLP models
+# API endpoints
+ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+EPOST_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/epost.fcgi"
+ARXIV_URL = "http://export.arxiv.org/api/query"
+CROSSREF_URL = "https://api.crossref.org/works"
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+
+# NCBI raises the E-utilities limit from 3 to 10 requests per second for keyed requests
+NCBI_API_KEY = os.environ.get("NCBI_API_KEY")
+# Contact address sent to NCBI (email) and CrossRef (mailto, for its faster polite pool)
+CONTACT_EMAIL = os.environ.get("RESEARCHASSISTAI_CONTACT_EMAIL")
+NCBI_TOOL = "ResearchAssistAI"
+USER_AGENT = "ResearchAssistAI/1.0"
 
 # Rate limiting parameters
-RATE_LIMIT = 2  # requests per second
-RATE_LIMIT_PERIOD = 1  # second
+RATE_LIMIT = 2  # requests per second for hosts without a published limit
+HOST_RATE_LIMITS = {
+    "eutils.ncbi.nlm.nih.gov": 10 if NCBI_API_KEY else 3,
+    "export.arxiv.org": 1 / 3,  # arXiv asks for no more than one request every three seconds
+    "api.crossref.org": 5,  # CrossRef public pool
+}
+# Source names used as metric labels
+HOST_SOURCES = {
+    "eutils.ncbi.nlm.nih.gov": "PubMed",
+    "export.arxiv.org": "arXiv",
+    "api.crossref.org": "CrossRef",
+}
+
+# PubMed bulk retrieval parameters
+PUBMED_ESEARCH_PAGE_SIZE = 10000  # ESearch returns at most 10,000 IDs per request
+PUBMED_EFETCH_BATCH_SIZE = 500
+# History server sessions expire, so cached epost/efetch responses are only reused briefly
+PUBMED_HISTORY_TTL = 60 * 60  # seconds
+
+# Deep paging parameters
+ARXIV_PAGE_SIZE = 500  # arXiv serves at most 2,000 results per request
+CROSSREF_PAGE_SIZE = 1000  # CrossRef's maximum rows per request
+# CrossRef cursors expire five minutes after use, so cursor pages are only reused briefly
+CROSSREF_CURSOR_TTL = 5 * 60  # seconds
+
+# Deduplication parameters
+DEDUP_TITLE_THRESHOLD = 0.8  # Jaccard similarity of title shingles for a near-duplicate
+DEDUP_SHINGLE_SIZE = 4  # characters per title shingle
+DEDUP_NUM_PERM = 64  # MinHash permutations
+DEDUP_BANDS = 16  # LSH bands (DEDUP_NUM_PERM / DEDUP_BANDS rows each)
+# Groups a title is compared against per LSH bucket; bounds the work when many similar
+# titles with different identifiers share a bucket
+DEDUP_MAX_BUCKET_CANDIDATES = 32
+# Title tokens that tell otherwise identical titles apart: anything containing a digit,
+# and roman numerals up to XXXIX
+DEDUP_NUMBER_PATTERN = re.compile(r"\w*\d\w*|x{0,3}(?:ix|iv|v?i{0,3})")
+
+# Watch mode parameters
+WATCH_STATE_PATH = os.path.join(".cache", "watch_state.json")
+# Days each incremental window reaches back before the previous run, so records dated
+# in a timezone behind UTC or indexed late aren't missed; repeats are dropped by ID
+WATCH_OVERLAP_DAYS = 1
+
+# HTTP client parameters
+HTTP_TIMEOUT = (5, 60)  # seconds to connect and to wait for data
+HTTP_POOL_SIZE = 10  # pooled keep-alive connections per host
+HTTP_MAX_RETRIES = 5  # retries of a single request
+HTTP_BACKOFF_BASE = 1.0  # seconds; the backoff ceiling doubles with each retry
+HTTP_BACKOFF_MAX = 60.0  # seconds; also caps Retry-After
+HTTP_RETRY_BUDGET = int(os.environ.get("RESEARCHASSISTAI_RETRY_BUDGET", 100))  # retries per run across all requests
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Response cache parameters
+RESPONSE_CACHE_PATH = os.path.join(".cache", "phase1_responses.sqlite")
+RESPONSE_CACHE_TTL = 24 * 60 * 60  # seconds
+RESPONSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# 'readwrite' caches live responses, 'replay' serves recorded responses only, 'off' disables the cache
+RESPONSE_CACHE_MODE = os.environ.get("RESEARCHASSISTAI_CACHE_MODE", "readwrite")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the request rate to a single host.
+
+    Callers reserve a token under the lock and sleep outside of it, so concurrent
+    callers are spaced out in arrival order instead of polling.
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        :param rate: Tokens added per second.
+        :param capacity: Maximum number of tokens that can accumulate (burst size).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available.
+
+        :return: Seconds spent waiting for the token.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0
+            self._tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """
+        Holds back every caller for the given time, e.g. after the host answered
+        429 Too Many Requests with a Retry-After header.
+
+        :param seconds: Seconds until the next token is handed out.
+        """
+        if math.isinf(self.rate):
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(host):
+    """
+    Returns the shared token bucket for a host, creating it on first use.
+
+    :param host: Host name, e.g. 'eutils.ncbi.nlm.nih.gov'.
+    :return: TokenBucket for the host.
+    """
+    with _rate_limiters_lock:
+        if host not in _rate_limiters:
+            _rate_limiters[host] = TokenBucket(HOST_RATE_LIMITS.get(host, RATE_LIMIT))
+        return _rate_limiters[host]
+
+
+class RetryBudget:
+    """
+    Thread-safe count of the retries left for this run, so a failing service can't
+    stall the pipeline with endless backoff.
+    """
+
+    def __init__(self, retries):
+        """
+        :param retries: Total number of retries allowed.
+        """
+        self.remaining = retries
+        self._lock = threading.Lock()
+
+    def take(self):
+        """
+        :return: True if a retry may be made; it is counted against the budget.
+        """
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+_http_session = None
+_retry_budget = None
+_http_lock = threading.RLock()
+
+
+def configure_http_client(retry_budget=HTTP_RETRY_BUDGET, pool_size=HTTP_POOL_SIZE):
+    """
+    Creates the shared HTTP session and resets the retry budget; call at the start of a run.
+
+    :param retry_budget: Retries allowed across all requests of the run.
+    :param pool_size: Keep-alive connections pooled per host.
+    :return: requests.Session used by the search functions.
+    """
+    global _http_session, _retry_budget
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "User-Agent": f"{USER_AGENT} (mailto:{CONTACT_EMAIL})" if CONTACT_EMAIL else USER_AGENT,
+    })
+    with _http_lock:
+        if _http_session is not None:
+            _http_session.close()
+        # Budget first: get_http_session's unlocked check may see the new session at once
+        _retry_budget = RetryBudget(retry_budget)
+        _http_session = session
+    return session
+
+
+def get_http_session():
+    """
+    Returns the shared HTTP session, creating it on first use.
+
+    :return: requests.Session.
+    """
+    if _http_session is None:
+        # Search threads may get here together; only the first one creates the session
+        with _http_lock:
+            if _http_session is None:
+                configure_http_client()
+    return _http_session
+
+
+def _retry_delay(attempt, response):
+    """
+    Seconds to wait before retrying: the server's Retry-After if it sent one,
+    otherwise exponential backoff with full jitter.
+
+    :param attempt: Number of retries already made for this request.
+    :param response: Failed response, or None after a connection error or timeout.
+    :return: Tuple of (delay, whether it came from Retry-After).
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0.0), HTTP_BACKOFF_MAX), True
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt)), False
+
+
+class CacheMissError(requests.RequestException):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class CachedResponse:
+    """
+    Response served from the response cache, exposing the parts of requests.Response
+    used by the search functions.
+    """
+
+    def __init__(self, url, status_code, content, content_type):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = {"Content-Type": content_type} if content_type else {}
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        # Only successful responses are ever stored
+        pass
+
+
+class ResponseCache:
+    """
+    Persistent SQLite-backed cache of HTTP responses keyed on URL plus normalized
+    query parameters, with a TTL and least-recently-used eviction beyond a size cap.
+    """
+
+    # Parameters that don't affect the response and must not end up in the cache file
+    IGNORED_PARAMS = {"api_key"}
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, ttl=RESPONSE_CACHE_TTL,
+                 max_bytes=RESPONSE_CACHE_MAX_BYTES, mode="readwrite"):
+        """
+        :param path: Path of the SQLite cache file.
+        :param ttl: Seconds a response stays fresh; None keeps responses until evicted.
+        :param max_bytes: Size cap for stored response bodies.
+        :param mode: 'readwrite' or 'replay'. Replay mode ignores the TTL and never
+                     touches the network.
+        """
+        if mode not in ("readwrite", "replay"):
+            raise ValueError(f"Unknown response cache mode: {mode}")
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, url TEXT, status INTEGER, content_type TEXT, "
+            "content BLOB, size INTEGER, created REAL, accessed REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+
+    @classmethod
+    def make_key(cls, url, params, method="GET"):
+        """
+        Builds the cache key for a request.
+
+        :param url: Request URL.
+        :param params: Query parameters (or form data for POST requests).
+        :param method: HTTP method.
+        :return: Hex digest identifying the request.
+        """
+        normalized = sorted(
+            (str(name), str(value)) for name, value in (params or {}).items()
+            if name not in cls.IGNORED_PARAMS
+        )
+        return hashlib.sha256(json.dumps([method, url, normalized]).encode("utf-8")).hexdigest()
+
+    def get(self, key, ttl=None):
+        """
+        Looks up a stored response.
+
+        :param key: Cache key from make_key.
+        :param ttl: Overrides the cache TTL for this lookup.
+        :return: CachedResponse, or None if missing or expired.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, content_type, content, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            url, status, content_type, content, created = row
+            if self.mode != "replay" and ttl is not None and time.time() - created > ttl:
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return CachedResponse(url, status, content, content_type)
+
+    def put(self, key, response):
+        """
+        Stores a response and evicts the least recently used entries above the size cap.
+
+        :param key: Cache key from make_key.
+        :param response: requests.Response to store.
+        """
+        now = time.time()
+        content = response.content
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, response.status_code, response.headers.get("Content-Type"),
+                 content, len(content), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        """Removes all stored responses."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+_response_cache = None
+_response_cache_configured = False
+_response_cache_lock = threading.RLock()
+
+
+def configure_response_cache(path=RESPONSE_CACHE_PATH, ttl=RESPONSE_CACHE_TTL,
+                             max_bytes=RESPONSE_CACHE_MAX_BYTES, mode=RESPONSE_CACHE_MODE):
+    """
+    Sets up the response cache used by the search functions.
+
+    :param path: Path of the SQLite cache file.
+    :param ttl: Seconds a response stays fresh; None keeps responses until evicted.
+    :param max_bytes: Size cap for stored response bodies.
+    :param mode: 'readwrite', 'replay' (recorded responses only, no network access) or 'off'.
+    :return: The ResponseCache, or None when caching is off.
+    """
+    global _response_cache, _response_cache_configured
+    with _response_cache_lock:
+        _response_cache = None if mode == "off" else ResponseCache(path, ttl, max_bytes, mode)
+        _response_cache_configured = True
+        return _response_cache
+
+
+def get_response_cache():
+    """
+    Returns the active response cache, creating it from the module defaults on first use.
+
+    :return: ResponseCache, or None when caching is off.
+    """
+    if not _response_cache_configured:
+        # Search threads may get here together; only the first one opens the cache
+        with _response_cache_lock:
+            if not _response_cache_configured:
+                configure_response_cache()
+    return _response_cache
+
+
+def _http_request(method, url, params, cache_ttl=None):
+    """
+    Issues a request through the response cache, waiting for the target host's
+    rate limiter only when the request actually goes to the network. Network requests
+    use the shared pooled session, and connection errors, timeouts and 429/5xx
+    responses are retried with backoff while the run's retry budget lasts.
+
+    :param method: 'GET' or 'POST'; POST requests send params as form data.
+    :param url: Request URL.
+    :param params: Query parameters or form data.
+    :param cache_ttl: Overrides the cache TTL for this request.
+    :return: requests.Response or CachedResponse object.
+    """
+    metrics = get_metrics()
+    host = urlparse(url).netloc
+    source = HOST_SOURCES.get(host, host)
+
+    cache = get_response_cache()
+    if cache is not None:
+        key = ResponseCache.make_key(url, params, method)
+        cached = cache.get(key, cache_ttl)
+        if cached is not None:
+            metrics.inc("http_cache_hits", source=source)
+            return cached
+        if cache.mode == "replay":
+            raise CacheMissError(f"No recorded response for {method} {url} with params {params}")
+
+    # Identify ourselves to the services; these never take part in the cache key
+    if source == "PubMed":
+        params = dict(params, tool=NCBI_TOOL)
+        if NCBI_API_KEY:
+            params["api_key"] = NCBI_API_KEY
+        if CONTACT_EMAIL:
+            params["email"] = CONTACT_EMAIL
+    elif source == "CrossRef" and CONTACT_EMAIL:
+        params = dict(params, mailto=CONTACT_EMAIL)
+
+    session = get_http_session()
+    limiter = get_rate_limiter(host)
+    attempt = 0
+    while True:
+        metrics.observe("rate_limiter_wait_seconds", limiter.acquire(), source=source)
+        error = response = None
+        try:
+            with metrics.timer("http_request_seconds", source=source):
+                if method == "POST":
+                    response = session.post(url, data=params, timeout=HTTP_TIMEOUT)
+                else:
+                    response = session.get(url, params=params, timeout=HTTP_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if response is not None:
+            metrics.inc("http_requests", source=source, status=response.status_code)
+            if response.status_code not in RETRY_STATUSES:
+                break
+
+        if attempt >= HTTP_MAX_RETRIES or not _retry_budget.take():
+            if error is not None:
+                raise error
+            # Hand the error response to the caller's raise_for_status
+            break
+        delay, from_server = _retry_delay(attempt, response)
+        attempt += 1
+        metrics.inc("http_retries", source=source)
+        logger.warning(f"{source} request failed ({error or response.status_code}); retry {attempt} in {delay:.1f}s")
+        if from_server:
+            # Retry-After applies to every request to the host, not just this one
+            limiter.pause(delay)
+        else:
+            time.sleep(delay)
+
+    metrics.inc("http_response_bytes", len(response.content), source=source)
+
+    if cache is not None and response.status_code == 200:
+        cache.put(key, response)
+    return response
+
+
+def _http_get(url, params, cache_ttl=None):
+    return _http_request("GET", url, params, cache_ttl)
+
+
+def _http_post(url, data, cache_ttl=None):
+    return _http_request("POST", url, data, cache_ttl)
+
 
 # Phase 1: Data Ingestion and Search Functionality
-def search_academic_sources(keywords, max_results=10):
+# Incremental (watch) searches
+class WatchState:
+    """
+    Per-source, per-query high-water marks for incremental searches, kept in a JSON file.
+
+    A mark holds the UTC date of the last successful search and the IDs it returned.
+    The next search only asks for records dated from that day on (less
+    WATCH_OVERLAP_DAYS), and drops the IDs already seen at the boundary. New marks are
+    held in memory until save() is called, so a run that fails before its results are
+    processed searches the same window again.
+    """
+
+    def __init__(self, path=WATCH_STATE_PATH):
+        """
+        :param path: Path of the state file; a missing file means no previous run.
+        """
+        self.path = path
+        self.today = datetime.now(timezone.utc).date()
+        self._lock = threading.Lock()
+        self._pending = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.updated = state.get("updated")
+            self._marks = state.get("marks", {})
+        else:
+            self.updated = None
+            self._marks = {}
+
+    def window(self, source, query):
+        """
+        :param source: Source name, e.g. 'PubMed'.
+        :param query: Keyword or query string the mark belongs to.
+        :return: Tuple of (first date to search as a datetime.date or None for a first
+                 full search, set of IDs already seen).
+        """
+        mark = self._marks.get(source, {}).get(query)
+        if mark is None:
+            return None, set()
+        since = datetime.strptime(mark["date"], "%Y-%m-%d").date() - timedelta(days=WATCH_OVERLAP_DAYS)
+        return since, set(mark["ids"])
+
+    def advance(self, source, query, ids):
+        """
+        Records the IDs a search returned as the source's new mark for the query.
+
+        :param source: Source name.
+        :param query: Keyword or query string.
+        :param ids: IDs of all records the search returned, seen before or not.
+        """
+        with self._lock:
+            self._pending.setdefault(source, {})[query] = {"date": self.today.isoformat(), "ids": sorted(set(ids))}
+
+    def save(self):
+        """Writes the advanced marks to the state file, replacing it atomically."""
+        with self._lock:
+            for source, marks in self._pending.items():
+                self._marks.setdefault(source, {}).update(marks)
+            self._pending = {}
+            self.updated = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            state = {"updated": self.updated, "marks": self._marks}
+
+        with atomic_write(self.path) as f:
+            json.dump(state, f, indent=2)
+
+
+def _watch_search(watch_state, source, query, fetch, max_results):
+    """
+    Runs one incremental search and keeps only records that weren't seen before.
+
+    :param watch_state: WatchState holding the source's mark.
+    :param source: Source name.
+    :param query: Query string the mark belongs to.
+    :param fetch: Callable taking the first date to search (or None) and returning
+                  articles; it must raise requests.RequestException on failure.
+    :param max_results: Limit the fetch was given, to warn when a window was cut short.
+    :return: List of new articles. Records without a DOI or arXiv ID can't be told
+             apart across runs and are skipped.
+    """
+    since, seen = watch_state.window(source, query)
+    try:
+        found = list(fetch(since))
+    except requests.RequestException as e:
+        logger.error(f"Error fetching {source} articles since {since}: {e}")
+        return []
+
+    if since is not None and len(found) >= max_results:
+        logger.warning(f"{source} returned {len(found)} articles since {since}, the limit; older new articles may be missed")
+    identified = []
+    for article in found:
+        ids = record_ids(article)
+        if ids:
+            identified.append((min(ids), article))
+    if len(identified) < len(found):
+        logger.info(f"Skipped {len(found) - len(identified)} {source} records without a DOI or arXiv ID")
+
+    watch_state.advance(source, query, [record_id for record_id, _ in identified])
+    return [article for record_id, article in identified if record_id not in seen]
+
+
+def search_academic_sources(keywords, max_results=10, max_workers=None, pubmed_bulk=False,
+                            deduplicate=True, watch_state=None):
     """
     Searches multiple academic sources (PubMed, arXiv, CrossRef) for articles based on keywords.
-    
+
+    All sources and keywords are queried concurrently; the result order is the same as a
+    sequential search (PubMed by keyword, then arXiv, then CrossRef).
+
     :param keywords: List of keywords for the search query.
     :param max_results: Maximum number of articles to retrieve from each source per keyword.
+    :param max_workers: Maximum number of concurrent requests (defaults to one per search task).
+    :param pubmed_bulk: Retrieve PubMed results for all keywords at once with search_pubmed_bulk.
+    :param deduplicate: Merge copies of the same paper with deduplicate_articles.
+    :param watch_state: WatchState for an incremental search: only articles newer than each
+                        source's mark are returned, and the marks are advanced (call
+                        watch_state.save() once the articles have been processed).
     :return: List of articles with abstracts and metadata.
     """
-    pubmed_articles = search_pubmed(keywords, max_results)
-    time.sleep(RATE_LIMIT_PERIOD)  # Rate limiting between different API calls
-    arxiv_articles = search_arxiv(keywords, max_results)
-    time.sleep(RATE_LIMIT_PERIOD)  # Rate limiting between different API calls
-    crossref_articles = search_crossref(keywords, max_results)
-    
+    results = {}
+    for source, keyword, articles in iter_search_results(keywords, max_results, max_workers, pubmed_bulk,
+                                                         watch_state):
+        results[(source, keyword)] = articles
+
+    if pubmed_bulk:
+        pubmed_articles = results.get(("PubMed", None), [])
+    else:
+        pubmed_articles = [article for keyword in keywords for article in results.get(("PubMed", keyword), [])]
+    logger.info(f"Total PubMed articles found: {len(pubmed_articles)}")
+    arxiv_articles = results.get(("arXiv", None), [])
+    crossref_articles = results.get(("CrossRef", None), [])
+
     all_articles = pubmed_articles + arxiv_articles + crossref_articles
+    if deduplicate:
+        all_articles = deduplicate_articles(all_articles)
     return all_articles
 
 
+def iter_search_results(keywords, max_results=10, max_workers=None, pubmed_bulk=False, watch_state=None):
+    """
+    Queries PubMed (one task per keyword), arXiv and CrossRef concurrently and yields the
+    results of each task as soon as it finishes. Requests to the same host are throttled
+    by that host's token bucket rather than by fixed sleeps.
+
+    :param keywords: List of keywords for the search query.
+    :param max_results: Maximum number of articles to retrieve from each source per keyword.
+    :param max_workers: Maximum number of concurrent requests (defaults to one per search task).
+    :param pubmed_bulk: Retrieve PubMed results for all keywords in one task with search_pubmed_bulk.
+    :param watch_state: WatchState for an incremental search (not supported with pubmed_bulk).
+    :return: Generator of (source, keyword, articles) tuples; keyword is None for arXiv and
+             CrossRef, which search all keywords in a single query, and for bulk PubMed searches.
+    """
+    if pubmed_bulk:
+        if watch_state is not None:
+            raise ValueError("Incremental searches are not supported with pubmed_bulk")
+        tasks = [("PubMed", None, search_pubmed_bulk, (keywords, max_results))]
+    else:
+        tasks = [("PubMed", keyword, _search_pubmed_keyword, (keyword, max_results, watch_state))
+                 for keyword in keywords]
+    tasks.append(("arXiv", None, search_arxiv, (keywords, max_results, watch_state)))
+    tasks.append(("CrossRef", None, search_crossref, (keywords, max_results, watch_state)))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(tasks))
+    try:
+        futures = {
+            executor.submit(func, *args): (source, keyword)
+            for source, keyword, func, args in tasks
+        }
+        for future in as_completed(futures):
+            source, keyword = futures[future]
+            yield source, keyword, future.result()
+    finally:
+        # Don't start queued searches if the consumer stops early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def search_pubmed(keywords, max_results=5):
     """
     Searches PubMed for articles based on keywords.
@@ -49,137 +709,632 @@ def search_pubmed(keywords, max_results=5):
     :param max_results: Maximum number of articles to retrieve per keyword.
     :return: List of article abstracts and metadata.
     """
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
     all_articles = []
-
     for keyword in keywords:
-        params = {
+        all_articles.extend(_search_pubmed_keyword(keyword, max_results))
+
+    logger.info(f"Total PubMed articles found: {len(all_articles)}")
+    return all_articles
+
+
+def _search_pubmed_keyword(keyword, max_results=5, watch_state=None):
+    """
+    Searches PubMed for a single keyword.
+
+    :param keyword: Keyword for the search query.
+    :param max_results: Maximum number of articles to retrieve.
+    :param watch_state: WatchState for an incremental search: only records added to PubMed
+                        (Entrez date) since the keyword's mark are fetched.
+    :return: List of article abstracts and metadata.
+    """
+    articles = []
+    params = {
+        "db": "pubmed",
+        "term": keyword,
+        "retmax": max_results,
+        "retmode": "json"
+    }
+    seen = set()
+    if watch_state is not None:
+        since, seen = watch_state.window("PubMed", keyword)
+        if since is not None:
+            params.update(datetype="edat", mindate=since.strftime("%Y/%m/%d"),
+                          maxdate=watch_state.today.strftime("%Y/%m/%d"))
+
+    try:
+        response = _http_get(ESEARCH_URL, params)
+        response.raise_for_status()
+        data = response.json()
+        logger.debug("PubMed search response for '%s': %s", keyword, data)
+        found_ids = data.get('esearchresult', {}).get('idlist', [])
+        article_ids = [pmid for pmid in found_ids if pmid not in seen]
+        if seen and len(found_ids) >= max_results:
+            logger.warning(f"PubMed returned {len(found_ids)} records for '{keyword}' since the last run, "
+                           "the limit; older new records may be missed")
+
+        if not article_ids:
+            if watch_state is not None:
+                watch_state.advance("PubMed", keyword, found_ids)
+            logger.warning(f"No {'new ' if seen else ''}PubMed articles found for the keyword: {keyword}")
+            return articles
+
+        fetch_params = {
             "db": "pubmed",
-            "term": keyword,
-            "retmax": max_results,
-            "retmode": "json"
+            "id": ",".join(article_ids),
+            "retmode": "xml",
+            "rettype": "abstract"
         }
+        fetch_response = _http_get(EFETCH_URL, fetch_params)
+        fetch_response.raise_for_status()
+        articles.extend(iter_pubmed_articles(fetch_response.content, lambda pmid: keyword))
+        if watch_state is not None:
+            watch_state.advance("PubMed", keyword, found_ids)
 
-        try:
-            response = requests.get(base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            logger.info(f"PubMed search response for '{keyword}': {data}")
-            article_ids = data.get('esearchresult', {}).get('idlist', [])
-            
-            if not article_ids:
-                logger.warning(f"No PubMed articles found for the keyword: {keyword}")
-                continue
+    except requests.RequestException as e:
+        logger.error(f"Error fetching PubMed articles for keyword '{keyword}': {e}")
+
+    return articles
+
+
+def search_pubmed_bulk(keywords, max_results=1000, batch_size=PUBMED_EFETCH_BATCH_SIZE):
+    """
+    Searches PubMed for all keywords and retrieves the union of the matching articles
+    through the E-utilities history server. IDs are deduplicated across keywords, posted
+    once with EPost and fetched in batches, so overlapping keywords don't re-download
+    the same records.
+
+    :param keywords: List of keywords for the search query.
+    :param max_results: Maximum number of IDs to collect per keyword (ESearch stops at
+                        10,000 records for PubMed).
+    :param batch_size: Number of records per EFetch request.
+    :return: List of article abstracts and metadata; 'keyword' is the first keyword that
+             matched each article.
+    """
+    keyword_by_id = {}
+    for keyword in keywords:
+        for pmid in _esearch_pubmed_ids(keyword, max_results):
+            keyword_by_id.setdefault(pmid, keyword)
+
+    if not keyword_by_id:
+        logger.warning(f"No PubMed articles found for the keywords: {keywords}")
+        return []
+
+    article_ids = list(keyword_by_id)
+    logger.info(f"PubMed bulk search: {len(article_ids)} unique articles across {len(keywords)} keywords")
+    articles = []
+
+    try:
+        post_response = _http_post(EPOST_URL, {"db": "pubmed", "id": ",".join(article_ids)},
+                                   cache_ttl=PUBMED_HISTORY_TTL)
+        post_response.raise_for_status()
+        post_result = etree.fromstring(post_response.content, etree.XMLParser(recover=True))
+        web_env = post_result.findtext("WebEnv") if post_result is not None else None
+        query_key = post_result.findtext("QueryKey") if post_result is not None else None
+        if not web_env or not query_key:
+            logger.error(f"PubMed EPost returned no history session: {post_response.text[:200]}")
+            return []
 
+        for retstart in range(0, len(article_ids), batch_size):
             fetch_params = {
                 "db": "pubmed",
-                "id": ",".join(article_ids),
+                "WebEnv": web_env,
+                "query_key": query_key,
+                "retstart": retstart,
+                "retmax": batch_size,
                 "retmode": "xml",
                 "rettype": "abstract"
             }
-            fetch_response = requests.get(fetch_url, params=fetch_params)
+            fetch_response = _http_get(EFETCH_URL, fetch_params, cache_ttl=PUBMED_HISTORY_TTL)
             fetch_response.raise_for_status()
+            articles.extend(iter_pubmed_articles(fetch_response.content, keyword_by_id.get))
+
+    except requests.RequestException as e:
+        logger.error(f"Error fetching PubMed articles in bulk: {e}")
+
+    logger.info(f"Total PubMed articles found: {len(articles)}")
+    return articles
+
 
-            soup = BeautifulSoup(fetch_response.content, "lxml-xml")
-            for article in soup.find_all("PubmedArticle"):
-                metadata = {
-                    "title": article.find("ArticleTitle").text if article.find("ArticleTitle") else "N/A",
-                    "abstract": " ".join([abstract.text for abstract in article.find_all("AbstractText")]),
-                    "authors": [author.find("LastName").text for author in article.find_all("Author") if author.find("LastName")],
-                    "journal": article.find("Title").text if article.find("Title") else "N/A",
-                    "doi": article.find("ELocationID", {"EIdType": "doi"}).text if article.find("ELocationID", {"EIdType": "doi"}) else "N/A",
-                    "source": "PubMed",
-                    "keyword": keyword
-                }
-                all_articles.append(metadata)
-
-            time.sleep(1 / RATE_LIMIT)  # Rate limiting
+def _esearch_pubmed_ids(keyword, max_results):
+    """
+    Collects PubMed IDs for a keyword, paging through ESearch results.
 
+    :param keyword: Keyword for the search query.
+    :param max_results: Maximum number of IDs to collect.
+    :return: List of PubMed IDs.
+    """
+    article_ids = []
+    while len(article_ids) < max_results:
+        params = {
+            "db": "pubmed",
+            "term": keyword,
+            "retstart": len(article_ids),
+            "retmax": min(PUBMED_ESEARCH_PAGE_SIZE, max_results - len(article_ids)),
+            "retmode": "json"
+        }
+        try:
+            response = _http_get(ESEARCH_URL, params)
+            response.raise_for_status()
+            result = response.json().get('esearchresult', {})
         except requests.RequestException as e:
-            logger.error(f"Error fetching PubMed articles for keyword '{keyword}': {e}")
+            logger.error(f"Error searching PubMed for keyword '{keyword}': {e}")
+            break
 
-    logger.info(f"Total PubMed articles found: {len(all_articles)}")
-    return all_articles
+        page = result.get('idlist', [])
+        article_ids.extend(page)
+        if not page or len(article_ids) >= int(result.get('count', 0)):
+            break
+
+    return article_ids
+
+
+def iter_pubmed_articles(source, keyword_for=lambda pmid: None):
+    """
+    Incrementally parses an EFetch XML payload, yielding one article at a time and
+    freeing each PubmedArticle element once it has been converted.
+
+    :param source: EFetch response body (bytes) or a binary file-like object.
+    :param keyword_for: Callable mapping a PubMed ID to the keyword that matched it.
+    :return: Generator of article abstracts and metadata.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    for _, article in etree.iterparse(source, events=("end",), tag="PubmedArticle", recover=True):
+        doi = next((location for location in article.iter("ELocationID") if location.get("EIdType") == "doi"), None)
+        authors = []
+        for author in article.iter("Author"):
+            last_name = _first(author, "LastName")
+            if last_name is not None:
+                authors.append(_text(last_name))
+        metadata = {
+            "title": _text(_first(article, "ArticleTitle"), "N/A"),
+            "abstract": " ".join([_text(abstract) for abstract in article.iter("AbstractText")]),
+            "authors": authors,
+            "journal": _text(_first(article, "Title"), "N/A"),
+            "doi": _text(doi, "N/A"),
+            "source": "PubMed",
+            "keyword": keyword_for(_text(_first(article, "PMID"), None))
+        }
+        _release(article)
+        yield metadata
+
+
+def iter_arxiv_entries(source):
+    """
+    Incrementally parses an arXiv Atom feed, yielding one article at a time and
+    freeing each entry element once it has been converted.
+
+    :param source: Feed body (bytes) or a binary file-like object.
+    :return: Generator of article abstracts and metadata.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    for _, entry in etree.iterparse(source, events=("end",), tag=f"{ATOM_NS}entry", recover=True):
+        metadata = {
+            "title": _text(_first(entry, f"{ATOM_NS}title"), "N/A"),
+            "abstract": _text(_first(entry, f"{ATOM_NS}summary"), "N/A"),
+            "authors": [_text(_first(author, f"{ATOM_NS}name"), "") for author in entry.iter(f"{ATOM_NS}author")],
+            "journal": "arXiv",
+            "doi": _text(_first(entry, f"{ATOM_NS}id"), "N/A"),
+            "source": "arXiv"
+        }
+        _release(entry)
+        yield metadata
+
+
+def _first(element, tag):
+    """Returns the first descendant of element with the given tag, or None."""
+    return next(element.iter(tag), None)
+
+
+def _text(element, default=""):
+    """Returns the full text content of an element, including nested markup, or default."""
+    return "".join(element.itertext()) if element is not None else default
+
+
+def _release(element):
+    """Frees a fully processed element and the already-processed siblings before it."""
+    element.clear()
+    while element.getprevious() is not None:
+        del element.getparent()[0]
 
-    
-def search_arxiv(keywords, max_results=5):
+
+def search_arxiv(keywords, max_results=5, watch_state=None):
     """
     Searches arXiv for articles based on keywords.
 
     :param keywords: List of keywords for the search query.
     :param max_results: Maximum number of articles to retrieve.
+    :param watch_state: WatchState for an incremental search: results are sorted by
+                        submission date and limited to submissions since the mark.
     :return: List of article abstracts and metadata.
     """
-    base_url = "http://export.arxiv.org/api/query"
-    query = "+AND+".join(keywords)
-    params = {
-        "search_query": f"all:{query}",
-        "start": 0,
-        "max_results": max_results
-    }
+    if watch_state is None:
+        return list(iter_arxiv(keywords, max_total=max_results))
+    return _watch_search(
+        watch_state, "arXiv", " ".join(keywords),
+        lambda since: _iter_arxiv_pages(keywords, max_results, ARXIV_PAGE_SIZE, since, watch_state.today),
+        max_results)
 
-    try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        # Use 'lxml' parser explicitly
-        soup = BeautifulSoup(response.content, "lxml-xml")
-        articles = []
-
-        for entry in soup.find_all("entry"):
-            metadata = {
-                "title": entry.find("title").text if entry.find("title") else "N/A",
-                "abstract": entry.find("summary").text if entry.find("summary") else "N/A",
-                "authors": [author.find("name").text for author in entry.find_all("author")],
-                "journal": "arXiv",
-                "doi": entry.find("id").text if entry.find("id") else "N/A",
-                "source": "arXiv"
-            }
-            articles.append(metadata)
 
-        time.sleep(1 / RATE_LIMIT)  # Rate limiting
-        return articles
+def iter_arxiv(keywords, max_total=None, page_size=ARXIV_PAGE_SIZE):
+    """
+    Lazily pages through arXiv search results using 'start' offsets. Pages are only
+    requested as the consumer asks for more articles, and the arXiv rate limiter
+    spaces page requests three seconds apart as the arXiv API guidelines ask.
 
+    :param keywords: List of keywords for the search query.
+    :param max_total: Maximum number of articles to yield; None pages until results run out.
+    :param page_size: Number of articles per request.
+    :return: Generator of article abstracts and metadata.
+    """
+    try:
+        yield from _iter_arxiv_pages(keywords, max_total, page_size)
     except requests.RequestException as e:
         print(f"Error fetching arXiv articles: {e}")
-        return []
-    
-    
-def search_crossref(keywords, max_results=5):
+
+
+def _iter_arxiv_pages(keywords, max_total, page_size, since=None, until=None):
+    """
+    Pages through arXiv search results like iter_arxiv, but raises request errors.
+
+    :param since: First submission date to include; when given, results are sorted by
+                  submission date, newest first.
+    :param until: Last submission date to include (with since).
+    """
+    # Spaces, not '+': requests encodes the parameters, turning spaces into '+'
+    query = " AND ".join(keywords)
+    if since is not None:
+        query += f" AND submittedDate:[{since:%Y%m%d}0000 TO {until:%Y%m%d}2359]"
+    start = 0
+
+    while max_total is None or start < max_total:
+        rows = page_size if max_total is None else min(page_size, max_total - start)
+        params = {
+            "search_query": f"all:{query}",
+            "start": start,
+            "max_results": rows
+        }
+        if since is not None:
+            params.update(sortBy="submittedDate", sortOrder="descending")
+
+        response = _http_get(ARXIV_URL, params)
+        response.raise_for_status()
+
+        count = 0
+        for metadata in iter_arxiv_entries(response.content):
+            count += 1
+            yield metadata
+
+        if count < rows:
+            return
+        start += count
+
+
+def search_crossref(keywords, max_results=5, watch_state=None):
     """
     Searches CrossRef for articles based on keywords.
 
     :param keywords: List of keywords for the search query.
     :param max_results: Maximum number of articles to retrieve.
+    :param watch_state: WatchState for an incremental search: only works indexed since
+                        the mark are returned.
     :return: List of article abstracts and metadata.
     """
-    base_url = "https://api.crossref.org/works"
-    params = {
-        "query": " ".join(keywords),
-        "rows": max_results
-    }
+    if watch_state is None:
+        return list(iter_crossref(keywords, max_total=max_results))
+    return _watch_search(
+        watch_state, "CrossRef", " ".join(keywords),
+        lambda since: _iter_crossref_pages(keywords, max_results, CROSSREF_PAGE_SIZE, since),
+        max_results)
+
+
+def iter_crossref(keywords, max_total=None, page_size=CROSSREF_PAGE_SIZE):
+    """
+    Lazily pages through CrossRef search results using deep-paging cursors. Pages are
+    only requested as the consumer asks for more articles.
 
+    :param keywords: List of keywords for the search query.
+    :param max_total: Maximum number of articles to yield; None pages until results run out.
+    :param page_size: Number of articles per request.
+    :return: Generator of article abstracts and metadata.
+    """
     try:
-        response = requests.get(base_url, params=params)
+        yield from _iter_crossref_pages(keywords, max_total, page_size)
+    except requests.RequestException as e:
+        print(f"Error fetching CrossRef articles: {e}")
+
+
+def _iter_crossref_pages(keywords, max_total, page_size, since=None):
+    """
+    Pages through CrossRef search results like iter_crossref, but raises request errors.
+
+    :param since: First index date to include (CrossRef's from-index-date filter).
+    """
+    cursor = "*"
+    yielded = 0
+    # A cached first page hands out its cursor again, so keep it only as long as cursors live
+    cache_ttl = None if max_total is not None and max_total <= page_size else CROSSREF_CURSOR_TTL
+
+    while max_total is None or yielded < max_total:
+        rows = page_size if max_total is None else min(page_size, max_total - yielded)
+        params = {
+            "query": " ".join(keywords),
+            "rows": rows,
+            "cursor": cursor
+        }
+        if since is not None:
+            params["filter"] = f"from-index-date:{since.isoformat()}"
+
+        response = _http_get(CROSSREF_URL, params, cache_ttl=cache_ttl)
         response.raise_for_status()
-        data = response.json()
-        items = data.get('message', {}).get('items', [])
-        articles = []
+        message = response.json().get('message', {})
 
+        items = message.get('items', [])
         for item in items:
-            metadata = {
-                "title": item.get("title", ["N/A"])[0],
-                "abstract": item.get("abstract", "N/A"),
-                "authors": [author.get("family", "Unknown") for author in item.get("author", [])],
-                "journal": item.get("container-title", ["N/A"])[0],
-                "doi": item.get("DOI", "N/A"),
-                "source": "CrossRef"
-            }
-            articles.append(metadata)
+            yield _crossref_metadata(item)
+            yielded += 1
 
-        time.sleep(1 / RATE_LIMIT)  # Rate limiting
-        return articles
+        cursor = message.get('next-cursor')
+        if len(items) < rows or not cursor:
+            return
+        cache_ttl = CROSSREF_CURSOR_TTL
 
-    except requests.RequestException as e:
-        print(f"Error fetching CrossRef articles: {e}")
-        return []
+
+def _crossref_metadata(item):
+    """
+    Converts a CrossRef work item into article metadata.
+
+    :param item: Work item from the CrossRef REST API.
+    :return: Article abstract and metadata.
+    """
+    return {
+        "title": item.get("title", ["N/A"])[0],
+        "abstract": item.get("abstract", "N/A"),
+        "authors": [author.get("family", "Unknown") for author in item.get("author", [])],
+        "journal": item.get("container-title", ["N/A"])[0],
+        "doi": item.get("DOI", "N/A"),
+        "source": "CrossRef"
+    }
+
+
+# Cross-source deduplication
+def normalize_doi(doi):
+    """
+    Normalizes a DOI for comparison, stripping resolver prefixes and case.
+
+    :param doi: DOI string as returned by a source.
+    :return: Normalized DOI, or None if the value is not a DOI.
+    """
+    if not isinstance(doi, str):
+        return None
+    doi = re.sub(r"^(https?://(dx\.)?doi\.org/|doi:\s*)", "", doi.strip().lower())
+    return doi if doi.startswith("10.") else None
+
+
+def normalize_arxiv_id(value):
+    """
+    Extracts an arXiv identifier from an abs/pdf URL, an 'arXiv:' reference or an arXiv
+    DOI (10.48550/arXiv.*), without its version suffix.
+
+    :param value: Identifier string as returned by a source.
+    :return: Lower-cased arXiv ID such as '2401.01234' or 'hep-th/9901001', or None.
+    """
+    if not isinstance(value, str):
+        return None
+    match = re.search(r"(?:arxiv\.org/(?:abs|pdf)/|^arxiv:\s*|10\.48550/arxiv\.)"
+                      r"([a-z\-]+(?:\.[a-z]{2})?/\d{7}|\d{4}\.\d{4,5})(?:v\d+)?",
+                      value.strip().lower())
+    return match.group(1) if match else None
+
+
+def record_ids(article):
+    """
+    :param article: Article metadata dict.
+    :return: Set of normalized identifiers of the record: 'doi:<doi>' and/or 'arxiv:<id>'.
+    """
+    ids = set()
+    arxiv_id = normalize_arxiv_id(article.get("doi"))
+    if arxiv_id:
+        ids.add(f"arxiv:{arxiv_id}")
+    else:
+        doi = normalize_doi(article.get("doi"))
+        if doi:
+            ids.add(f"doi:{doi}")
+    return ids
+
+
+def normalize_title(title):
+    """
+    Normalizes a title for comparison: strips markup, accents, punctuation, case and
+    repeated whitespace.
+
+    :param title: Title string as returned by a source.
+    :return: Normalized title, or an empty string for missing titles.
+    """
+    if not isinstance(title, str) or title == "N/A":
+        return ""
+    title = re.sub(r"<[^>]+>", " ", title)
+    title = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^\w\s]", " ", title.lower()).split())
+
+
+def deduplicate_articles(articles, threshold=DEDUP_TITLE_THRESHOLD):
+    """
+    Merges copies of the same paper found through different sources or keywords.
+
+    Articles are matched on normalized DOI or arXiv ID, on identical normalized titles,
+    and on near-identical titles found with MinHash/LSH over character shingles, which
+    keeps the cost close to linear in the number of articles. A title only joins a group
+    if it is near-identical to the group's first title, so matches do not chain from one
+    title to the next. Titles are never matched when their numbers or roman numerals
+    differ (parts, trial phases, cohorts) or when both sides carry different identifiers.
+
+    :param articles: List of article metadata dicts.
+    :param threshold: Minimum Jaccard similarity of title shingles for a near-duplicate.
+    :return: List of merged articles in first-seen order. Each keeps the fields of its
+             first copy, filling missing values from the others, and records its
+             provenance in 'sources' and 'keywords'.
+    """
+    import numpy as np
+
+    parent = list(range(len(articles)))
+    identifiers = [record_ids(article) for article in articles]
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    def conflicting(first, second):
+        return identifiers[first] and identifiers[second] and not identifiers[first] & identifiers[second]
+
+    def union(first, second, by_title):
+        first, second = find(first), find(second)
+        if first == second:
+            return
+        if by_title and conflicting(first, second):
+            return
+        first, second = min(first, second), max(first, second)
+        parent[second] = first
+        identifiers[first] |= identifiers[second]
+
+    by_id = {}
+    by_title = {}
+    for index, article in enumerate(articles):
+        for identifier in list(identifiers[index]):
+            union(by_id.setdefault(identifier, index), index, False)
+        title = normalize_title(article.get("title"))
+        if title:
+            union(by_title.setdefault(title, index), index, True)
+
+    # Near-duplicate titles: one representative per distinct normalized title. Titles are
+    # bucketed per LSH band together with their numbers, so titles with different numbers
+    # never meet, and each title is compared with the first titles of the groups in its
+    # buckets only
+    representatives = list(by_title.values())
+    shingle_sets = [_title_shingles(title) for title in by_title]
+    signatures = _minhash_signatures(shingle_sets)
+    numbers = {}
+    number_ids = [numbers.setdefault(_title_numbers(title), len(numbers)) for title in by_title]
+    rows = DEDUP_NUM_PERM // DEDUP_BANDS
+    band_ids = []
+    for band in range(DEDUP_BANDS):
+        band_keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        band_keys = band_keys.view(np.dtype((np.void, band_keys.dtype.itemsize * rows))).ravel()
+        band_ids.append(np.unique(band_keys, return_inverse=True)[1].tolist())
+
+    def bucket_keys(position):
+        return [(band, band_ids[band][position], number_ids[position]) for band in range(DEDUP_BANDS)]
+
+    heads = set()  # groups (by root) whose first title has been placed
+    # Bucket key -> first titles of the groups in the bucket, and of those without an
+    # identifier; a group with an identifier can only merge with groups that have none
+    buckets, open_buckets = {}, {}
+    for position in range(len(representatives)):
+        root = find(representatives[position])
+        if root in heads:
+            continue
+        keys = bucket_keys(position)
+        candidates = open_buckets if identifiers[root] else buckets
+        best, best_similarity, compared = None, threshold, set()
+        for key in keys:
+            for other in islice(candidates.get(key, ()), DEDUP_MAX_BUCKET_CANDIDATES):
+                if other in compared:
+                    continue
+                compared.add(other)
+                if conflicting(root, find(representatives[other])):
+                    continue
+                similarity = _jaccard(shingle_sets[position], shingle_sets[other])
+                if similarity >= best_similarity:
+                    best, best_similarity = other, similarity
+        if best is None:
+            heads.add(root)
+            for key in keys:
+                buckets.setdefault(key, []).append(position)
+                if not identifiers[root]:
+                    open_buckets.setdefault(key, []).append(position)
+            continue
+        union(representatives[best], representatives[position], True)
+        root = find(root)
+        heads.add(root)
+        if identifiers[root]:
+            for key in bucket_keys(best):
+                if best in open_buckets.get(key, ()):
+                    open_buckets[key].remove(best)
+
+    groups = {}
+    for index in range(len(articles)):
+        groups.setdefault(find(index), []).append(articles[index])
+
+    merged_articles = [_merge_articles(group) for group in groups.values()]
+    logger.info(f"Deduplicated {len(articles)} articles into {len(merged_articles)}")
+    return merged_articles
+
+
+def _title_numbers(title):
+    """Returns the number and roman numeral tokens of a normalized title, in order."""
+    return tuple(token for token in title.split() if DEDUP_NUMBER_PATTERN.fullmatch(token))
+
+
+def _title_shingles(title):
+    """Returns the set of character shingles of a normalized title."""
+    if len(title) <= DEDUP_SHINGLE_SIZE:
+        return {title}
+    return {title[i:i + DEDUP_SHINGLE_SIZE] for i in range(len(title) - DEDUP_SHINGLE_SIZE + 1)}
+
+
+def _minhash_signatures(shingle_sets, block_size=4096):
+    """
+    Computes MinHash signatures for many shingle sets at once. Each permutation is a
+    multiply-add hash in wrapping uint32 arithmetic over the shingles' string hashes, so
+    signatures are only comparable within one process.
+
+    :param shingle_sets: List of non-empty shingle sets.
+    :param block_size: Number of sets hashed per vectorized block.
+    :return: uint32 array of shape (len(shingle_sets), DEDUP_NUM_PERM).
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(1)
+    coefficients = rng.integers(0, 2 ** 31, size=DEDUP_NUM_PERM, dtype=np.uint32) * 2 + 1
+    offsets = rng.integers(0, 2 ** 32, size=DEDUP_NUM_PERM, dtype=np.uint32)
+
+    signatures = np.empty((len(shingle_sets), DEDUP_NUM_PERM), dtype=np.uint32)
+    for block_start in range(0, len(shingle_sets), block_size):
+        block = shingle_sets[block_start:block_start + block_size]
+        lengths = np.fromiter((len(shingles) for shingles in block), dtype=np.int64, count=len(block))
+        hashes = np.fromiter((hash(shingle) & 0xFFFFFFFF for shingles in block for shingle in shingles),
+                             dtype=np.uint32, count=int(lengths.sum()))
+        hashed = hashes[:, None] * coefficients + offsets
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        signatures[block_start:block_start + len(block)] = np.minimum.reduceat(hashed, starts, axis=0)
+    return signatures
+
+
+def _jaccard(first, second):
+    """Returns the Jaccard similarity of two sets."""
+    return len(first & second) / len(first | second)
+
+
+def _is_missing(value):
+    return value is None or value == "N/A" or value == "" or value == []
+
+
+def _merge_articles(group):
+    """
+    Merges copies of one paper into a single record.
+
+    :param group: Article metadata dicts in first-seen order.
+    :return: Merged article with 'sources' and 'keywords' provenance lists.
+    """
+    merged = dict(group[0])
+    for article in group[1:]:
+        for field, value in article.items():
+            if _is_missing(merged.get(field)) and not _is_missing(value):
+                merged[field] = value
+
+    merged["sources"] = list(dict.fromkeys(article["source"] for article in group if article.get("source")))
+    merged["keywords"] = list(dict.fromkeys(article["keyword"] for article in group if article.get("keyword")))
+    return merged
@@ -1,60 +1,508 @@
-import spacy
-from transformers import pipeline
-import openai
-from langchain_ollama import ChatOllama
+import hashlib
 import json
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
-
-# Initialize summarization pipeline
-from langchain_ollama import ChatOllama
-
-# Initialize the ChatOllama model
-summarizer = ChatOllama(
-    model="mathstral:7b-v0.1-q6_K",
-    temperature=0.2,
-    max_tokens=512,
-    top_p=0.5,
-)
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from metrics import get_metrics
+from gazetteer import load_gazetteer
+
+# spaCy model
+SPACY_MODEL = "en_core_web_sm"
+
+# Model settings; the LLM cache keys on these, so change them here rather than on the clients
+SUMMARIZER_SETTINGS = {
+    "model": "mathstral:7b-v0.1-q6_K",
+    "temperature": 0.2,
+    "max_tokens": 512,
+    "top_p": 0.5,
+}
+CHAT_MODEL_SETTINGS = {
+    "model": "mathstral:7b-v0.1-q6_K",  # You can change this to any available model
+    "temperature": 0.3,
+    "max_tokens": 512,
+}
 
-# Initialize the ChatOllama model
-chat_model = ChatOllama(
-    model="mathstral:7b-v0.1-q6_K",  # You can change this to any available model
-    temperature=0.3,
-    max_tokens=512,
+# Prompt templates
+SUMMARY_PROMPT = "Summarize the following text in a concise manner:"
+CHUNK_SUMMARY_PROMPT = "Summarize the following excerpt from a longer document in a concise manner, keeping its key methods, results and numbers:"
+REDUCE_SUMMARY_PROMPT = "Combine the following partial summaries of one document into a single concise summary:"
+DESCRIPTION_PROMPT = (
+    "Based on the following methods and results, generate a concise and clear description:\n\n"
+    "Methods:\n{methods}\n\nResults:\n{results}\n\n"
+    "Provide a comprehensive summary that explains the significance and implications of these findings."
 )
 
+# Fallback texts returned when a model call fails
+SUMMARY_FAILED = "Summary not available."
+DESCRIPTION_FAILED = "Description generation failed."
+
+# LLM completion cache parameters
+LLM_CACHE_PATH = os.path.join(".cache", "phase2_llm.sqlite")
+LLM_CACHE_ENABLED = os.environ.get("RESEARCHASSISTAI_LLM_CACHE", "on") != "off"
+
+# spaCy batch processing parameters
+SPACY_BATCH_SIZE = 64
+SPACY_N_PROCESS = 1  # worker processes for nlp.pipe; raise on multi-core boxes
+# Pipeline components the sentence classification doesn't use
+UNUSED_PIPES = ["tagger", "attribute_ruler", "lemmatizer"]
+# Entity labels collected by extract_key_information and the lists they go into
+ENTITY_LABELS = {"DISEASE": "DISEASES", "TREATMENT": "TREATMENTS"}
+# Look up DISEASES and TREATMENTS in the gazetteer term lists (see gazetteer.py)
+GAZETTEER_ENABLED = os.environ.get("RESEARCHASSISTAI_GAZETTEER", "on") != "off"
+
+# Sentence keywords, matched against the lower-cased sentence
+METHOD_PATTERN = re.compile("method|procedure")
+RESULT_PATTERN = re.compile("result|finding")
+
+# Default number of LLM requests in flight at once; match OLLAMA_NUM_PARALLEL on the server
+LLM_CONCURRENCY = int(os.environ.get("RESEARCHASSISTAI_LLM_CONCURRENCY", 4))
+
+# Long-document summarization parameters; token counts are estimated from characters
+CHARS_PER_TOKEN = 4
+LONG_TEXT_TOKENS = 2048  # texts above this are summarized chunk by chunk
+CHUNK_TOKENS = 1500  # token budget of each chunk and of each reduce step's input
+# spaCy components needed to split sentences
+SENTENCE_PIPES = ["tok2vec", "parser", "senter", "sentencizer"]
+
+
+# Models are loaded on first use so importing this module stays cheap
+_models = {}
+_models_lock = threading.Lock()
+
+# Per worker thread: the semaphore capping the in-flight model calls of the process_articles
+# or summarize_long_text call it works for, including nested chunk summaries
+_llm_slots = threading.local()
+
+
+def _load_once(name, loader):
+    with _models_lock:
+        if name not in _models:
+            _models[name] = loader()
+        return _models[name]
+
+
+def get_nlp():
+    """
+    Returns the spaCy pipeline, loading it on first use.
+
+    :return: spaCy Language object.
+    """
+    def load():
+        import spacy
+        return spacy.load(SPACY_MODEL)
+    return _load_once("nlp", load)
+
+
+def get_gazetteer():
+    """
+    Returns the disease and treatment gazetteer, loading it on first use.
+
+    :return: gazetteer.Gazetteer.
+    """
+    return _load_once("gazetteer", load_gazetteer)
+
+
+def get_summarizer():
+    """
+    Returns the ChatOllama client used for summaries, creating it on first use.
+
+    :return: ChatOllama model.
+    """
+    def load():
+        from langchain_ollama import ChatOllama
+        return ChatOllama(**SUMMARIZER_SETTINGS)
+    return _load_once("summarizer", load)
+
+
+def get_chat_model():
+    """
+    Returns the ChatOllama client used for descriptions, creating it on first use.
+
+    :return: ChatOllama model.
+    """
+    def load():
+        from langchain_ollama import ChatOllama
+        return ChatOllama(**CHAT_MODEL_SETTINGS)
+    return _load_once("chat_model", load)
+
+
+def __getattr__(name):
+    # Keep the former module-level model attributes working without loading them at import
+    loaders = {"nlp": get_nlp, "summarizer": get_summarizer, "chat_model": get_chat_model}
+    if name in loaders:
+        return loaders[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LLMCache:
+    """
+    Persistent SQLite-backed cache of LLM completions, keyed on a hash of the prompt
+    template, the input text, the model name and the sampling parameters.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH):
+        """
+        :param path: Path of the SQLite cache file.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, model TEXT, template_hash TEXT, completion TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_model ON completions (model)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_template ON completions (template_hash)")
+        self._conn.commit()
+
+    @staticmethod
+    def template_hash(template):
+        return hashlib.sha256(template.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_key(template, text, settings):
+        """
+        Builds the cache key for a completion.
+
+        :param template: Prompt template the input is inserted into.
+        :param text: Input text.
+        :param settings: Model settings with 'model' and sampling parameters.
+        :return: Hex digest identifying the completion.
+        """
+        key = {
+            "template": template,
+            "input": text,
+            "model": settings.get("model"),
+            "temperature": settings.get("temperature"),
+            "top_p": settings.get("top_p"),
+            "max_tokens": settings.get("max_tokens"),
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Looks up a cached completion and updates the hit/miss counters.
+
+        :param key: Cache key from make_key.
+        :return: Completion text, or None on a miss.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT completion FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, settings, template, completion):
+        """
+        Stores a successful completion.
+
+        :param key: Cache key from make_key.
+        :param settings: Model settings the completion was generated with.
+        :param template: Prompt template the completion was generated from.
+        :param completion: Completion text.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)",
+                (key, settings.get("model"), self.template_hash(template), completion)
+            )
+            self._conn.commit()
+
+    def invalidate(self, model=None, template=None):
+        """
+        Drops cached completions for a model and/or prompt template, or everything when
+        neither is given. Use this after re-pulling a model under the same name.
+
+        :param model: Model name whose completions to drop.
+        :param template: Prompt template whose completions to drop.
+        :return: Number of completions removed.
+        """
+        conditions, values = [], []
+        if model is not None:
+            conditions.append("model = ?")
+            values.append(model)
+        if template is not None:
+            conditions.append("template_hash = ?")
+            values.append(self.template_hash(template))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            removed = self._conn.execute(f"DELETE FROM completions{where}", values).rowcount
+            self._conn.commit()
+        return removed
+
+    def stats(self):
+        """
+        :return: Dictionary with hits, misses, hit rate and number of stored completions.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+_llm_cache = None
+_llm_cache_configured = False
+_llm_cache_lock = threading.RLock()
+
+
+def configure_llm_cache(path=LLM_CACHE_PATH, enabled=LLM_CACHE_ENABLED):
+    """
+    Sets up the completion cache used by summarize_text and generate_description.
+
+    :param path: Path of the SQLite cache file.
+    :param enabled: Set to False to always call the model.
+    :return: The LLMCache, or None when caching is disabled.
+    """
+    global _llm_cache, _llm_cache_configured
+    with _llm_cache_lock:
+        _llm_cache = LLMCache(path) if enabled else None
+        _llm_cache_configured = True
+        return _llm_cache
+
+
+def get_llm_cache():
+    """
+    Returns the active completion cache, creating it from the module defaults on first use.
+
+    :return: LLMCache, or None when caching is disabled.
+    """
+    if not _llm_cache_configured:
+        # Worker threads and nested chunk summaries may get here together; only the
+        # first one opens the cache
+        with _llm_cache_lock:
+            if not _llm_cache_configured:
+                configure_llm_cache()
+    return _llm_cache
+
+
+def _cached_invoke(get_model, settings, template, text, prompt):
+    """
+    Invokes a chat model through the completion cache. Exceptions propagate to the
+    caller and nothing is cached for them, nor for empty completions.
+
+    :param get_model: Function returning the ChatOllama client, only called on a cache miss.
+    :param settings: Settings the client was created with.
+    :param template: Prompt template, part of the cache key.
+    :param text: Input inserted into the template, part of the cache key.
+    :param prompt: Full prompt sent to the model.
+    :return: Completion text.
+    """
+    metrics = get_metrics()
+    cache = get_llm_cache()
+    if cache is not None:
+        key = LLMCache.make_key(template, text, settings)
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.inc("llm_cache_hits", model=settings.get("model"))
+            return cached
+
+    model = get_model()
+    with getattr(_llm_slots, "semaphore", None) or nullcontext():
+        start = time.perf_counter()
+        response = model.invoke(prompt)
+        metrics.observe("llm_call_seconds", time.perf_counter() - start, model=settings.get("model"))
+    completion = response.content
+    if metrics.enabled:
+        usage = getattr(response, "usage_metadata", None) or {}
+        tokens = usage.get("output_tokens") or estimate_tokens(completion or "")
+        metrics.inc("llm_completion_tokens", tokens, model=settings.get("model"))
+    if cache is not None and completion:
+        cache.put(key, settings, template, completion)
+    return completion
+
 def summarize_text(text):
     """
-    Summarizes the given text using the ChatOllama model.
+    Summarizes the given text using the ChatOllama model. Texts longer than
+    LONG_TEXT_TOKENS are summarized with summarize_long_text.
 
     :param text: The text to summarize.
     :return: Summarized text.
     """
     try:
-        prompt = "Summarize the following text in a concise manner:"
-        prompt = prompt + text
-        
-        # Invoke the model with the input text
-        completion = summarizer.invoke(prompt)
-        summary = completion.content
+        if estimate_tokens(text) > LONG_TEXT_TOKENS:
+            summary = summarize_long_text(text)
+        else:
+            prompt = SUMMARY_PROMPT + text
+
+            # Invoke the model with the input text
+            summary = _cached_invoke(get_summarizer, SUMMARIZER_SETTINGS, SUMMARY_PROMPT, text, prompt)
         print(summary)
         # The response is already a string, so we can return it directly
         return summary
     except Exception as e:
         print(f"Error during summarization: {e}")
-        return "Summary not available."
+        return SUMMARY_FAILED
+
+
+def estimate_tokens(text):
+    """
+    :param text: Input text.
+    :return: Rough number of model tokens in the text.
+    """
+    return len(text) // CHARS_PER_TOKEN
+
+
+def summarize_long_text(text, chunk_tokens=CHUNK_TOKENS, max_concurrency=LLM_CONCURRENCY):
+    """
+    Map-reduce summarization for texts too long for one prompt. The text is split on
+    sentence boundaries into chunks of about chunk_tokens tokens, the chunks are
+    summarized concurrently, and the partial summaries are combined in groups that fit
+    the same budget, level by level, until one summary is left. Each call goes through
+    the completion cache, so a rerun after a failure only repeats the missing calls.
+
+    :param text: The text to summarize.
+    :param chunk_tokens: Token budget of each model input.
+    :param max_concurrency: Maximum number of concurrent model calls for this text. Called
+                            from process_articles' workers, the calls also count against
+                            that call's limit.
+    :return: Summarized text. Exceptions from model calls propagate.
+    """
+    semaphore = getattr(_llm_slots, "semaphore", None) or threading.BoundedSemaphore(max_concurrency)
+
+    def summarize(template, part):
+        return _with_llm_slots(semaphore, _cached_invoke, get_summarizer, SUMMARIZER_SETTINGS, template, part,
+                               f"{template}\n\n{part}")
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        chunks = split_into_chunks(text, chunk_tokens)
+        summaries = list(executor.map(lambda chunk: summarize(CHUNK_SUMMARY_PROMPT, chunk), chunks))
+        while len(summaries) > 1:
+            groups = _pack(summaries, chunk_tokens, min_size=2)
+            summaries = list(executor.map(lambda group: summarize(REDUCE_SUMMARY_PROMPT, "\n\n".join(group)), groups))
+    return summaries[0] if summaries else ""
+
+
+def split_into_chunks(text, chunk_tokens=CHUNK_TOKENS):
+    """
+    Splits text into chunks of whole sentences within a token budget, using the spaCy
+    pipeline's sentence boundaries. Paragraphs are parsed separately, so texts longer
+    than nlp.max_length are handled; a single sentence over budget is cut by length.
+
+    :param text: The text to split.
+    :param chunk_tokens: Token budget of each chunk.
+    :return: List of chunk texts.
+    """
+    nlp = get_nlp()
+    disabled = [name for name in nlp.pipe_names if name not in SENTENCE_PIPES]
+    paragraphs = [paragraph for paragraph in re.split(r"\n\s*\n", text) if paragraph.strip()]
+    max_chars = chunk_tokens * CHARS_PER_TOKEN
+
+    sentences = []
+    for doc in nlp.pipe(paragraphs, batch_size=SPACY_BATCH_SIZE, disable=disabled):
+        for sent in doc.sents:
+            sentence = sent.text.strip()
+            sentences.extend(sentence[start:start + max_chars] for start in range(0, len(sentence), max_chars))
+    return [" ".join(chunk) for chunk in _pack(sentences, chunk_tokens)]
+
+
+def _pack(texts, budget, min_size=1):
+    """
+    Groups consecutive texts so each group's estimated token count stays within budget.
+    Groups hold at least min_size texts even if that exceeds the budget, so repeated
+    packing always shrinks the list.
+    """
+    groups, group, group_tokens = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text) + 1
+        if len(group) >= min_size and group_tokens + tokens > budget:
+            groups.append(group)
+            group, group_tokens = [], 0
+        group.append(text)
+        group_tokens += tokens
+    if group:
+        if len(group) < min_size and groups:
+            groups[-1].extend(group)
+        else:
+            groups.append(group)
+    return groups
     
     
 # Phase 2: NLP for Information Extraction and Summarization
 def extract_key_information(text):
     """
-    Extracts key information such as entities, methodologies, and results from text using spaCy.
+    Extracts key information such as entities, methodologies, and results from text using spaCy
+    and the disease and treatment gazetteer.
 
     :param text: The text to analyze.
     :return: Dictionary of extracted entities and key information.
     """
-    doc = nlp(text)
+    return _classify_doc(get_nlp()(text, disable=_unused_pipes()))
+
+
+def extract_key_information_batch(texts, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS, as_tuples=False):
+    """
+    Extracts key information from many texts with nlp.pipe, skipping pipeline components
+    the classification doesn't need. Results are identical to extract_key_information.
+
+    :param texts: Iterable of texts, or of (text, context) tuples when as_tuples is set.
+    :param batch_size: Number of texts per spaCy batch.
+    :param n_process: Number of worker processes.
+    :param as_tuples: Pass a context object through alongside each text.
+    :return: Generator of extracted-information dicts, or of (dict, context) tuples.
+    """
+    docs = _timed_docs(get_nlp().pipe(texts, batch_size=batch_size, n_process=n_process, disable=_unused_pipes(), as_tuples=as_tuples))
+    if as_tuples:
+        for doc, context in docs:
+            yield _classify_doc(doc), context
+    else:
+        for doc in docs:
+            yield _classify_doc(doc)
+
+
+def _timed_docs(docs):
+    """Passes docs through, recording spaCy's time per doc when metrics are enabled."""
+    metrics = get_metrics()
+    if not metrics.enabled:
+        yield from docs
+        return
+    docs = iter(docs)
+    while True:
+        start = time.perf_counter()
+        try:
+            doc = next(docs)
+        except StopIteration:
+            return
+        metrics.observe("spacy_doc_seconds", time.perf_counter() - start)
+        metrics.inc("spacy_docs")
+        yield doc
+
+
+def _unused_pipes():
+    """
+    Returns the names of loaded pipeline components that don't affect the extracted
+    information. The NER component is only kept if the model predicts a label we collect.
+    """
+    nlp = get_nlp()
+    disabled = [name for name in UNUSED_PIPES if name in nlp.pipe_names]
+    if "ner" in nlp.pipe_names and not set(ENTITY_LABELS) & set(nlp.get_pipe("ner").labels):
+        disabled.append("ner")
+    return disabled
+
+
+def _classify_doc(doc):
+    """
+    Buckets the sentences and entities of a parsed document.
+
+    :param doc: spaCy Doc.
+    :return: Dictionary of extracted entities and key information.
+    """
     entities = {
         "METHODS": [],
         "RESULTS": [],
@@ -62,25 +510,32 @@ def extract_key_information(text):
         "TREATMENTS": [],
         "OTHER": []
     }
-    
+
     # Classify sentences into categories based on keywords
     for sent in doc.sents:
-        if "method" in sent.text.lower() or "procedure" in sent.text.lower():
-            entities["METHODS"].append(sent.text)
-        elif "result" in sent.text.lower() or "finding" in sent.text.lower():
-            entities["RESULTS"].append(sent.text)
+        text = sent.text
+        lowered = text.lower()
+        if METHOD_PATTERN.search(lowered):
+            entities["METHODS"].append(text)
+        elif RESULT_PATTERN.search(lowered):
+            entities["RESULTS"].append(text)
         else:
-            entities["OTHER"].append(sent.text)
+            entities["OTHER"].append(text)
 
     # Extract specific entities like diseases and treatments
+    found = set()
     for ent in doc.ents:
-        if ent.label_ == "DISEASE":
-            entities["DISEASES"].append(ent.text)
-        elif ent.label_ == "TREATMENT":
-            entities["TREATMENTS"].append(ent.text)
-    
-    return entities
+        if ent.label_ in ENTITY_LABELS:
+            entities[ENTITY_LABELS[ent.label_]].append(ent.text)
+            found.add((ENTITY_LABELS[ent.label_], ent.start_char, ent.end_char))
+
+    # General-purpose models predict neither label, so also look the terms up by name
+    if GAZETTEER_ENABLED:
+        for label, start, end, text in get_gazetteer().find(doc.text):
+            if (label, start, end) not in found:
+                entities[label].append(text)
 
+    return entities
 
 
 def generate_description(methods, results):
@@ -91,25 +546,66 @@ def generate_description(methods, results):
     :param results: List of result descriptions.
     :return: Generated description as a string.
     """
-    prompt = (
-        f"Based on the following methods and results, generate a concise and clear description:\n\n"
-        f"Methods:\n{methods}\n\nResults:\n{results}\n\n"
-        "Provide a comprehensive summary that explains the significance and implications of these findings."
-    )
-    
+    prompt = DESCRIPTION_PROMPT.format(methods=methods, results=results)
+
     try:
         # Call ChatOllama to generate the description
-        completion = chat_model.invoke(prompt)
-        response = completion.content
+        inputs = json.dumps({"methods": methods, "results": results})
+        response = _cached_invoke(get_chat_model, CHAT_MODEL_SETTINGS, DESCRIPTION_PROMPT, inputs, prompt)
         print(response)
         # The response is already a string, so we can return it directly
         return response
     except Exception as e:
         print(f"Error generating description: {e}")
-        return "Description generation failed."
+        return DESCRIPTION_FAILED
     
     
     
+def _with_llm_slots(semaphore, function, *args):
+    """Runs function in the calling worker thread with its model calls capped by semaphore."""
+    previous = getattr(_llm_slots, "semaphore", None)
+    _llm_slots.semaphore = semaphore
+    try:
+        return function(*args)
+    finally:
+        _llm_slots.semaphore = previous
+
+
+def process_articles(articles, max_concurrency=LLM_CONCURRENCY):
+    """
+    Runs extraction, summarization and description generation over many articles,
+    overlapping the LLM calls.
+
+    spaCy extraction runs in batches in the calling thread while the summary and description
+    requests, which are independent of each other, run on a pool of max_concurrency
+    workers. At most max_concurrency articles have LLM requests queued ahead of the
+    consumer (and one spaCy batch is read ahead), so a slow consumer applies
+    backpressure instead of queueing the whole corpus. Point OLLAMA_HOST at a stub server to run this without a model.
+
+    :param articles: Iterable of article dicts with an 'abstract' key.
+    :param max_concurrency: Maximum number of concurrent LLM requests, including the chunk
+                            summaries of long abstracts.
+    :return: Generator of (article, key_info, summary, description) tuples in input order.
+    """
+    semaphore = threading.BoundedSemaphore(max_concurrency)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        pending = deque()
+        abstracts = ((article['abstract'], article) for article in articles)
+        for key_info, article in extract_key_information_batch(abstracts, as_tuples=True):
+            summary = executor.submit(_with_llm_slots, semaphore, summarize_text, article['abstract'])
+            description = executor.submit(_with_llm_slots, semaphore, generate_description, key_info['METHODS'],
+                                          key_info['RESULTS'])
+            pending.append((article, key_info, summary, description))
+
+            if len(pending) > max_concurrency:
+                article, key_info, summary, description = pending.popleft()
+                yield article, key_info, summary.result(), description.result()
+
+        while pending:
+            article, key_info, summary, description = pending.popleft()
+            yield article, key_info, summary.result(), description.result()
+
+
 def process_and_save_article(article):
     # Extract key information
     extracted_info = extract_key_information(article['abstract'])
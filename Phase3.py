@@ -1,95 +1,372 @@
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
 from rdflib import Graph, Namespace, RDF, URIRef, Literal
 from rdflib.namespace import RDFS, OWL, XSD
+from rdflib.plugin import PluginException
+from rdflib.plugins.stores.memory import Memory, SimpleMemory
+import os
+import shutil
+import time
 import uuid
+from Phase1 import normalize_doi, normalize_title
+from metrics import get_metrics
+
+# Define namespaces
+RESAI = Namespace("http://researchassistai.org/ontology/")
+BIO = Namespace("http://bioportal.bioontology.org/ontologies/")
+
+# Namespace for the UUID5 article identifiers
+ARTICLE_UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "http://researchassistai.org/ontology/article/")
+
+# Persistent knowledge graph parameters
+TRIPLE_STORE_PATH = "knowledge_graph"
+TRIPLE_STORE_BACKEND = "BerkeleyDB"  # rdflib's on-disk store; needs the berkeleydb package
+UPSERT_CHUNK_SIZE = 10000  # articles mapped per upsert batch
+EXPORT_CHUNK_SIZE = 10000  # lines written per export chunk
 
 #Phase 3: Data Integration
+# Raw article fields and their harmonized column names
+COLUMN_MAPPING = {
+    'authors': 'Author',
+    'title': 'Title',
+    'abstract': 'Abstract',
+    'journal': 'Journal',
+    'doi': 'DOI',
+    'url': 'URL',
+    'publication_date': 'PublicationDate',
+    'year': 'Year',
+    'source': 'Source'
+}
+MISSING_VALUES = ["N/A", ""]  # placeholders the sources use for missing fields
+STRING_COLUMNS = ['Title', 'Abstract', 'DOI', 'URL', 'PublicationDate']
+CATEGORICAL_COLUMNS = ['Journal', 'Source']  # low cardinality, stored dictionary-encoded
+
+# Harmonized dataset parameters
+HARMONIZED_DATASET_PATH = "harmonized_articles"
+HARMONIZED_PARTITION_COLUMNS = ['Source']
+HARMONIZE_CHUNK_SIZE = 10000  # rows harmonized and appended per chunk
+
+
 def harmonize_data(dataframes):
     """
-    Harmonizes data from multiple sources into a single, consistent format.
+    Harmonizes data from multiple sources into a single, consistent format. Missing
+    values are nulls, authors are lists, and Journal and Source are categoricals.
 
     :param dataframes: List of pandas DataFrames to harmonize.
     :return: Harmonized pandas DataFrame.
     """
-    harmonized_df = pd.concat(dataframes, ignore_index=True)
-    
-    # Rename columns to ensure consistency
-    column_mapping = {
-        'authors': 'Author',
-        'title': 'Title',
-        'abstract': 'Abstract',
-        'journal': 'Journal',
-        'doi': 'DOI',
-        'url': 'URL',
-        'publication_date': 'PublicationDate',
-        'year': 'Year',
-        'source': 'Source'
-    }
-    
-    harmonized_df.rename(columns=column_mapping, inplace=True)
-    
-    # Ensure all expected columns exist, fill with 'N/A' if missing
-    for col in column_mapping.values():
+    harmonized_df = pd.concat(dataframes, ignore_index=True).rename(columns=COLUMN_MAPPING)
+
+    # Ensure all expected columns exist, with nulls where data is missing
+    for col in COLUMN_MAPPING.values():
         if col not in harmonized_df.columns:
-            harmonized_df[col] = 'N/A'
-    
+            harmonized_df[col] = pd.NA
+        elif col != 'Author':
+            harmonized_df[col] = harmonized_df[col].replace(MISSING_VALUES, pd.NA)
+
+    harmonized_df['Author'] = harmonized_df['Author'].map(_author_list).astype(object)
+    harmonized_df['Year'] = pd.to_numeric(harmonized_df['Year'], errors='coerce').astype('Int64')
+    for col in STRING_COLUMNS:
+        harmonized_df[col] = harmonized_df[col].astype('string')
+    for col in CATEGORICAL_COLUMNS:
+        harmonized_df[col] = harmonized_df[col].astype('string').astype('category')
+
     return harmonized_df
 
 
+def iter_harmonized(dataframes, chunk_size=HARMONIZE_CHUNK_SIZE):
+    """
+    Harmonizes DataFrames chunk by chunk, so a large corpus can be appended to the
+    dataset without holding all of it in memory in harmonized form.
+
+    :param dataframes: Iterable of raw pandas DataFrames.
+    :param chunk_size: Number of rows harmonized per chunk.
+    :return: Generator of harmonized DataFrames.
+    """
+    for data_frame in dataframes:
+        for start in range(0, len(data_frame), chunk_size):
+            yield harmonize_data([data_frame.iloc[start:start + chunk_size]])
+
+
+def _author_list(value):
+    """Normalizes an author field to a list of names, or None if there are none."""
+    if hasattr(value, "tolist"):
+        # Parquet list columns come back as numpy arrays
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        authors = [str(author) for author in value if isinstance(author, str) and author not in MISSING_VALUES]
+        return authors or None
+    if isinstance(value, str) and value not in MISSING_VALUES:
+        return [value]
+    return None
+
+
+def _harmonized_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('Author', pa.list_(pa.string())),
+        ('Title', pa.string()),
+        ('Abstract', pa.string()),
+        ('Journal', pa.dictionary(pa.int32(), pa.string())),
+        ('DOI', pa.string()),
+        ('URL', pa.string()),
+        ('PublicationDate', pa.string()),
+        ('Year', pa.int64()),
+        ('Source', pa.dictionary(pa.int32(), pa.string())),
+    ])
+
+
+def write_harmonized_dataset(data, root=HARMONIZED_DATASET_PATH, partition_cols=HARMONIZED_PARTITION_COLUMNS, overwrite=False):
+    """
+    Appends harmonized articles to a Parquet dataset partitioned by source. Each call
+    (and each chunk) adds new files, so existing data is never rewritten. Only the
+    harmonized columns are stored.
+
+    :param data: Harmonized DataFrame, or an iterable of them such as iter_harmonized().
+    :param root: Dataset directory.
+    :param partition_cols: Columns the dataset is partitioned on.
+    :param overwrite: Remove any existing dataset at root first.
+    :return: Number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if overwrite and os.path.isdir(root):
+        shutil.rmtree(root)
+
+    schema = _harmonized_schema()
+    written = 0
+    for chunk in ([data] if isinstance(data, pd.DataFrame) else data):
+        if chunk.empty:
+            continue
+        table = pa.Table.from_pandas(chunk[schema.names], schema=schema, preserve_index=False)
+        pq.write_to_dataset(table, root, partition_cols=partition_cols,
+                            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet")
+        written += table.num_rows
+    return written
+
+
+def read_harmonized_dataset(root=HARMONIZED_DATASET_PATH, columns=None, filters=None):
+    """
+    Loads harmonized articles from a Parquet dataset. Only the requested columns are
+    read, and filters on partition columns skip whole partitions.
+
+    :param root: Dataset directory.
+    :param columns: Columns to load; all by default.
+    :param filters: pyarrow filter expression or list of (column, op, value) tuples,
+                    e.g. [('Source', '==', 'PubMed')].
+    :return: Harmonized pandas DataFrame.
+    """
+    import pyarrow.parquet as pq
+
+    data_frame = pq.read_table(root, columns=columns, filters=filters).to_pandas()
+    if 'Author' in data_frame.columns:
+        data_frame['Author'] = data_frame['Author'].map(_author_list).astype(object)
+    for col in STRING_COLUMNS:
+        if col in data_frame.columns:
+            data_frame[col] = data_frame[col].astype('string')
+    for col in CATEGORICAL_COLUMNS:
+        if col in data_frame.columns:
+            data_frame[col] = data_frame[col].astype('string').astype('category')
+    return data_frame
+
+
+def article_uri(namespace, doi=None, title=None, abstract=None):
+    """
+    Mints a deterministic URI for an article: a UUID5 over its normalized DOI, or its
+    normalized title when it has no DOI, so the same paper maps to the same node in
+    every run and graphs from different runs can be merged.
+
+    :param namespace: Ontology namespace the article URI lives in.
+    :param doi: Article DOI.
+    :param title: Article title, used when the DOI is missing.
+    :param abstract: Article abstract, used when both DOI and title are missing.
+    :return: URIRef for the article.
+    """
+    doi = normalize_doi(doi)
+    title = normalize_title(title)
+    if doi:
+        name = f"doi:{doi}"
+    elif title:
+        name = f"title:{title}"
+    elif isinstance(abstract, str) and abstract.strip():
+        name = f"abstract:{abstract.strip()}"
+    else:
+        # Nothing identifies the article, so it can't be matched across runs
+        return URIRef(namespace[f"article/{uuid.uuid4()}"])
+    return URIRef(namespace[f"article/{uuid.uuid5(ARTICLE_UUID_NAMESPACE, name)}"])
+
+
+def _date_literal(value):
+    try:
+        return Literal(value, datatype=XSD.date)
+    except ValueError:
+        # If date parsing fails, add it as a string
+        return Literal(str(value))
+
+
 def ontology_mapping(data_frame):
     """ Maps data to an ontology using RDFLib to link related concepts.
+
+    Triples are built column by column and loaded into the graph in one batch.
     
     :param data_frame: The harmonized pandas DataFrame.
     :return: RDF graph with mapped ontology.
     """
-    # Define namespaces
-    RESAI = Namespace("http://researchassistai.org/ontology/")
-    BIO = Namespace("http://bioportal.bioontology.org/ontologies/")
+    start = time.perf_counter()
 
     # Create an RDF graph
     graph = Graph()
     graph.bind("resai", RESAI)
     graph.bind("bio", BIO)
 
-    for _, row in data_frame.iterrows():
-        # Generate a unique URI for each article
-        article_uri = URIRef(RESAI[f"article/{uuid.uuid4()}"])
-
-        # Add triples to the graph, checking for column existence and handling potential missing data
-        graph.add((article_uri, RDF.type, RESAI.Article))
-
-        if 'Title' in data_frame.columns and pd.notna(row["Title"]):
-            graph.add((article_uri, RESAI.title, Literal(row["Title"])))
+    def column(name):
+        return data_frame[name] if name in data_frame.columns else pd.Series([None] * len(data_frame), index=data_frame.index)
 
-        if 'Author' in data_frame.columns and pd.notna(row["Author"]):
-            authors = row["Author"] if isinstance(row["Author"], list) else [row["Author"]]
-            for author in authors:
-                graph.add((article_uri, RESAI.author, Literal(author)))
+    # Generate a deterministic URI for each article
+    uris = [
+        article_uri(RESAI, doi, title, abstract)
+        for doi, title, abstract in zip(column("DOI"), column("Title"), column("Abstract"))
+    ]
+    triples = [(uri, RDF.type, RESAI.Article) for uri in uris]
 
-        if 'Abstract' in data_frame.columns and pd.notna(row["Abstract"]):
-            graph.add((article_uri, RESAI.abstract, Literal(row["Abstract"])))
+    # Add literal triples per column, skipping missing data
+    for name, predicate in (("Title", RESAI.title), ("Abstract", RESAI.abstract),
+                            ("Journal", RESAI.journal), ("DOI", RESAI.doi)):
+        values = column(name)
+        triples.extend(
+            (uri, predicate, Literal(value))
+            for uri, value, present in zip(uris, values, values.notna()) if present
+        )
 
-        if 'PublicationDate' in data_frame.columns and pd.notna(row["PublicationDate"]):
-            try:
-                graph.add((article_uri, RESAI.publicationDate, Literal(row["PublicationDate"], datatype=XSD.date)))
-            except ValueError:
-                # If date parsing fails, add it as a string
-                graph.add((article_uri, RESAI.publicationDate, Literal(str(row["PublicationDate"]))))
+    authors = column("Author")
+    for uri, value, present in zip(uris, authors, authors.notna()):
+        if present:
+            triples.extend((uri, RESAI.author, Literal(author)) for author in (value if isinstance(value, list) else [value]))
 
-        if 'Journal' in data_frame.columns and pd.notna(row["Journal"]):
-            graph.add((article_uri, RESAI.journal, Literal(row["Journal"])))
+    dates = column("PublicationDate")
+    triples.extend(
+        (uri, RESAI.publicationDate, _date_literal(value))
+        for uri, value, present in zip(uris, dates, dates.notna()) if present
+    )
 
-        if 'DOI' in data_frame.columns and pd.notna(row["DOI"]):
-            graph.add((article_uri, RESAI.doi, Literal(row["DOI"])))
+    # Example linking to external ontology (BioPortal)
+    mentions_cancer = column("Abstract").str.contains("cancer", case=False, regex=False, na=False)
+    triples.extend((uri, RDFS.seeAlso, BIO.Cancer) for uri, linked in zip(uris, mentions_cancer) if linked)
 
-        # Example linking to external ontology (BioPortal)
-        if 'Abstract' in data_frame.columns and pd.notna(row["Abstract"]) and "cancer" in row["Abstract"].lower():
-            graph.add((article_uri, RDFS.seeAlso, BIO.Cancer))
+    graph.addN((subject, predicate, obj, graph) for subject, predicate, obj in triples)
+    metrics = get_metrics()
+    metrics.observe("rdf_mapping_seconds", time.perf_counter() - start)
+    metrics.inc("rdf_triples", len(triples))
 
     # Enrich graph with ontological relationships
     graph.add((RESAI.Article, OWL.sameAs, RESAI.ResearchPaper))
-    graph.add((RESAI.Article, OWL.subClassOf, RESAI.Publication))
+    graph.add((RESAI.Article, RDFS.subClassOf, RESAI.Publication))
 
     return graph
 
+
+def open_triple_store(path=TRIPLE_STORE_PATH, backend=TRIPLE_STORE_BACKEND):
+    """
+    Opens the persistent knowledge graph, creating it on first use. Falls back to an
+    in-memory graph when the backend's driver isn't installed.
+
+    :param path: Directory of the on-disk store.
+    :param backend: rdflib store plugin name.
+    :return: rdflib Graph backed by the store.
+    """
+    try:
+        graph = Graph(store=backend, identifier=RESAI["graph"])
+        graph.open(os.path.abspath(path), create=True)
+    except (ImportError, PluginException) as e:
+        # rdflib only registers the BerkeleyDB store when its driver is importable
+        print(f"Persistent triple store unavailable ({e}); using an in-memory graph")
+        graph = Graph(identifier=RESAI["graph"])
+    graph.bind("resai", RESAI)
+    graph.bind("bio", BIO)
+    return graph
+
+
+def is_persistent_store(graph):
+    """
+    :param graph: rdflib Graph.
+    :return: True if the graph's triples outlive the process.
+    """
+    return not isinstance(graph.store, (Memory, SimpleMemory))
+
+
+def close_triple_store(graph):
+    """
+    Flushes and closes a graph opened with open_triple_store.
+
+    :param graph: rdflib Graph.
+    """
+    if hasattr(graph.store, "sync"):
+        graph.store.sync()
+    graph.close()
+
+
+def upsert_articles(graph, data_frame, chunk_size=UPSERT_CHUNK_SIZE):
+    """
+    Maps articles into an existing graph, replacing any triples previously stored for
+    the same article URIs. Rows are mapped chunk by chunk so memory use is bounded by
+    the chunk size rather than the size of the graph or the DataFrame.
+
+    :param graph: Target graph, typically from open_triple_store.
+    :param data_frame: The harmonized pandas DataFrame.
+    :param chunk_size: Number of rows mapped per batch.
+    :return: Number of articles upserted.
+    """
+    upserted = 0
+    for start in range(0, len(data_frame), chunk_size):
+        mapped = ontology_mapping(data_frame.iloc[start:start + chunk_size])
+        articles = set(mapped.subjects(RDF.type, RESAI.Article))
+        for article in articles:
+            graph.remove((article, None, None))
+        graph.addN((subject, predicate, obj, graph) for subject, predicate, obj in mapped)
+        upserted += len(articles)
+    return upserted
+
+
+def _nt_term(term):
+    """Serializes an RDF term in N-Triples syntax."""
+    if isinstance(term, Literal):
+        escaped = (str(term).replace("\\", "\\\\").replace('"', '\\"')
+                   .replace("\n", "\\n").replace("\r", "\\r"))
+        if term.language:
+            return f'"{escaped}"@{term.language}'
+        if term.datatype:
+            return f'"{escaped}"^^<{term.datatype}>'
+        return f'"{escaped}"'
+    if isinstance(term, URIRef):
+        return f"<{term}>"
+    return term.n3()
+
+
+def export_graph(graph, path, format="nt", chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Streams a graph to an N-Triples or N-Quads file, writing chunk_size lines at a time
+    instead of building the whole serialization in memory.
+
+    :param graph: rdflib Graph to export.
+    :param path: Output file path.
+    :param format: 'nt' for N-Triples or 'nq' for N-Quads (named after the graph).
+    :param chunk_size: Number of lines buffered per write.
+    :return: Number of triples written.
+    """
+    if format not in ("nt", "nq"):
+        raise ValueError(f"Unsupported export format: {format}")
+    suffix = f" {_nt_term(graph.identifier)} .\n" if format == "nq" else " .\n"
+
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        lines = []
+        for subject, predicate, obj in graph.triples((None, None, None)):
+            lines.append(f"{_nt_term(subject)} {_nt_term(predicate)} {_nt_term(obj)}{suffix}")
+            if len(lines) >= chunk_size:
+                f.writelines(lines)
+                written += len(lines)
+                lines = []
+        f.writelines(lines)
+        written += len(lines)
+    return written
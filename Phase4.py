@@ -1,37 +1,313 @@
 import cv2
+import numpy as np
 import pytesseract
+import bisect
+import glob
+import hashlib
+import json
 import os
-import openai
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from metrics import get_metrics
+from fileutils import atomic_write
+
+# Batch OCR parameters
+OCR_CACHE_DIR = os.path.join(".cache", "ocr")
+OCR_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+OCR_CACHE_VERSION = 2  # bump when OCR output changes, so stale cache entries are ignored
+PREPROCESS_SETTINGS = {"size": (800, 800), "block_size": 11, "c": 2}
+TESSERACT_CONFIG = ""
+
+# Region-aware OCR parameters
+OCR_SOURCE_DPI = 96  # assumed resolution of figures; OpenCV doesn't read DPI metadata
+OCR_TARGET_DPI = 300  # resolution Tesseract is most accurate at
+OCR_MAX_SIDE = 4000  # upper bound on the resized image's longer side
+REGION_SETTINGS = {"source_dpi": OCR_SOURCE_DPI, "target_dpi": OCR_TARGET_DPI, "max_side": OCR_MAX_SIDE}
+# Tesseract page segmentation mode for the stacked text regions: sparse text, in no particular order
+PSM_SPARSE_TEXT = 11
 
 # Phase 4: Image and Multimedia Analysis
-def preprocess_image(image_path):
+def preprocess_image(image_path, size=(800, 800), block_size=11, c=2):
     """ Preprocesses an image by converting to grayscale, resizing, and applying adaptive thresholding.
 
     :param image_path: Path to the image file.
+    :param size: (width, height) the image is resized to.
+    :param block_size: Neighbourhood size for adaptive thresholding (odd).
+    :param c: Constant subtracted from the neighbourhood mean.
     :return: Preprocessed image.
     """
     image = cv2.imread(image_path)
+    if image is None:
+        # cv2.imread returns None instead of raising for missing or unreadable files
+        raise ValueError(f"Could not read image: {image_path}")
 
     # Convert to grayscale
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
     # Resize the image to a fixed size for consistency
-    resized = cv2.resize(gray, (800, 800))
+    resized = cv2.resize(gray, tuple(size))
 
     # Apply adaptive thresholding to enhance text regions
-    processed_image = cv2.adaptiveThreshold(resized, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    processed_image = cv2.adaptiveThreshold(resized, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, c)
 
     return processed_image
 
-def extract_data_from_image(image):
+def extract_data_from_image(image, config=TESSERACT_CONFIG):
     """ Extracts text data from a processed image using OCR.
 
     :param image: Preprocessed image.
+    :param config: Extra Tesseract command-line options.
     :return: Extracted text data.
     """
     # Use Tesseract OCR to extract text from the image
-    text = pytesseract.image_to_string(image)
+    text = pytesseract.image_to_string(image, config=config)
 
     # Further processing can be done to extract quantitative data from text
     return text
 
+
+def resize_to_dpi(image, source_dpi=OCR_SOURCE_DPI, target_dpi=OCR_TARGET_DPI, max_side=OCR_MAX_SIDE):
+    """
+    Rescales an image from source_dpi to target_dpi, keeping its aspect ratio.
+
+    :param image: Image array.
+    :param source_dpi: Resolution the image was rendered at.
+    :param target_dpi: Resolution to rescale to.
+    :param max_side: Upper bound on the longer side after rescaling.
+    :return: (resized image, scale factor applied).
+    """
+    height, width = image.shape[:2]
+    scale = min(target_dpi / source_dpi, max_side / max(height, width))
+    if abs(scale - 1) < 1e-3:
+        return image, 1.0
+    interpolation = cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation), scale
+
+
+def detect_text_regions(gray, dpi=OCR_TARGET_DPI):
+    """
+    Finds text lines in a grayscale image. Character edges are found with a
+    morphological gradient, then closed along the reading direction so that each
+    line of text becomes one contour. Vertical lines (such as y-axis labels) are
+    found the same way on the image rotated by 90 degrees.
+
+    :param gray: Grayscale image.
+    :param dpi: Resolution of the image, used to scale kernels and size limits.
+    :return: List of (x, y, w, h, vertical) boxes in reading order.
+    """
+    horizontal = _text_line_boxes(gray, dpi)
+
+    height = gray.shape[0]
+    vertical = [
+        (y, height - x - w, h, w)  # map boxes on the rotated image back
+        for x, y, w, h in _text_line_boxes(cv2.rotate(gray, cv2.ROTATE_90_CLOCKWISE), dpi)
+        if w >= 3 * h  # whole lines only; single glyphs are picked up horizontally
+    ]
+
+    def inside_vertical(box):
+        cx, cy = box[0] + box[2] / 2, box[1] + box[3] / 2
+        return any(vx <= cx <= vx + vw and vy <= cy <= vy + vh for vx, vy, vw, vh in vertical)
+
+    # Glyphs of a vertical label also show up as small horizontal boxes
+    regions = [(*box, False) for box in horizontal if not inside_vertical(box)]
+    regions.extend((*box, True) for box in vertical)
+    return sorted(regions, key=lambda region: (region[1], region[0]))
+
+
+def _text_line_boxes(gray, dpi):
+    """Bounding boxes of horizontal text lines."""
+    unit = max(1, round(dpi / 100))
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    # Join characters into words and words into lines, without merging lines
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15 * unit, unit)))
+    contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    # Text at 6-48pt; anything taller is a plot element rather than a line of text
+    min_height, max_height = dpi * 6 / 72, dpi * 48 / 72
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if min_height <= h <= max_height and w >= min_height / 2:
+            # Mostly edge pixels means text; bars and lines are mostly empty inside
+            if cv2.countNonZero(binary[y:y + h, x:x + w]) >= 0.2 * w * h:
+                boxes.append((x, y, w, h))
+    return boxes
+
+
+def ocr_text_regions(image_path, source_dpi=OCR_SOURCE_DPI, target_dpi=OCR_TARGET_DPI, max_side=OCR_MAX_SIDE,
+                     config=TESSERACT_CONFIG):
+    """ Extracts text from an image by OCRing only its text regions. Text lines are located
+    with detect_text_regions at the image's own resolution; only those crops are scaled to
+    the target DPI, binarized, turned upright and stacked on one canvas, which Tesseract
+    reads in a single pass. Each word is assigned to the region whose band it falls in.
+
+    :param image_path: Path to the image file.
+    :param source_dpi: Resolution the image was rendered at.
+    :param target_dpi: Resolution text regions are OCRed at.
+    :param max_side: Upper bound on the longer side of a scaled region.
+    :param config: Extra Tesseract command-line options.
+    :return: List of dicts with 'text', 'bbox' ([x, y, w, h] in original image pixels) and
+             'vertical', in reading order; regions without text are dropped.
+    """
+    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError(f"Could not read image: {image_path}")
+    regions = detect_text_regions(image, source_dpi)
+    if not regions:
+        return []
+
+    pad = max(2, round(source_dpi / 50))
+    crops = []
+    for x, y, w, h, vertical in regions:
+        crop = image[max(0, y - pad):y + h + pad, max(0, x - pad):x + w + pad]
+        if vertical:
+            # Rotate so the text reads left to right
+            crop = cv2.rotate(crop, cv2.ROTATE_90_CLOCKWISE)
+        crop, _ = resize_to_dpi(crop, source_dpi, target_dpi, max_side)
+        _, crop = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        crops.append(crop)
+
+    # One region per band, separated by blank space so lines never run together
+    gap = max(10, round(target_dpi / 10))
+    canvas = np.full((sum(crop.shape[0] for crop in crops) + gap * (len(crops) + 1),
+                      max(crop.shape[1] for crop in crops) + 2 * gap), 255, np.uint8)
+    band_tops = []
+    top = gap
+    for crop in crops:
+        canvas[top:top + crop.shape[0], gap:gap + crop.shape[1]] = crop
+        band_tops.append(top)
+        top += crop.shape[0] + gap
+
+    data = pytesseract.image_to_data(canvas, config=f"--psm {PSM_SPARSE_TEXT} {config}".strip(),
+                                     output_type=pytesseract.Output.DICT)
+    words = [[] for _ in regions]
+    for text, left, word_top, height in zip(data["text"], data["left"], data["top"], data["height"]):
+        text = text.strip()
+        if text:
+            band = bisect.bisect_right(band_tops, word_top + height / 2) - 1
+            words[max(band, 0)].append((left, text))
+
+    return [
+        {
+            "text": " ".join(text for _, text in sorted(region_words)),
+            "bbox": [x, y, w, h],
+            "vertical": vertical,
+        }
+        for (x, y, w, h, vertical), region_words in zip(regions, words) if region_words
+    ]
+
+
+def find_images(source):
+    """
+    Lists the images to OCR.
+
+    :param source: Directory (searched recursively for image files) or glob pattern.
+    :return: Sorted list of image paths.
+    """
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(source)
+            for name in names if name.lower().endswith(OCR_IMAGE_EXTENSIONS)
+        ]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(paths)
+
+
+def ocr_images(source, max_workers=None, settings=None, config=TESSERACT_CONFIG, cache_dir=OCR_CACHE_DIR,
+               regions=False):
+    """
+    Preprocesses and OCRs a batch of images across a process pool, yielding each result
+    as soon as it is ready. A failing image produces a result with an error instead of
+    stopping the batch. Results are cached by image content and OCR parameters, so
+    unchanged images are not OCRed again.
+
+    :param source: Directory, glob pattern, or list of image paths.
+    :param max_workers: Number of worker processes (defaults to the number of cores).
+    :param settings: preprocess_image keyword arguments (defaults to PREPROCESS_SETTINGS), or
+                     ocr_text_regions ones (defaults to REGION_SETTINGS) when regions is set.
+    :param config: Extra Tesseract command-line options.
+    :param cache_dir: Directory of the result cache, or None to disable caching.
+    :param regions: OCR only detected text regions with ocr_text_regions; results then also
+                    have a 'regions' key.
+    :return: Generator of dicts with 'path', 'text', 'error', 'cached' and 'seconds' keys, in
+             completion order.
+    """
+    metrics = get_metrics()
+    paths = find_images(source) if isinstance(source, str) else list(source)
+    if not paths:
+        return
+    settings = {**(REGION_SETTINGS if regions else PREPROCESS_SETTINGS), **(settings or {})}
+
+    executor = ProcessPoolExecutor(max_workers=min(max_workers or os.cpu_count() or 1, len(paths)),
+                                   initializer=_init_ocr_worker)
+    try:
+        futures = {executor.submit(_ocr_image, path, settings, config, cache_dir, regions): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. a crash inside OpenCV)
+                result = {"path": futures[future], "text": None, "error": f"{type(e).__name__}: {e}", "cached": False,
+                          "seconds": None}
+            if result["seconds"] is not None:
+                # Workers are separate processes, so their timings are recorded here
+                metrics.observe("ocr_image_seconds", result["seconds"], cached=result["cached"])
+            if result["error"]:
+                metrics.inc("ocr_errors")
+            yield result
+    finally:
+        # Don't start queued images if the consumer stops early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_ocr_worker():
+    # One OpenCV thread per worker process; the pool already uses every core
+    cv2.setNumThreads(1)
+
+
+def _ocr_image(path, settings, config, cache_dir, regions=False):
+    """Runs in a worker process: OCRs one image, using the cache when possible."""
+    start = time.perf_counter()
+    result = {"path": path, "text": None, "error": None, "cached": False, "seconds": None}
+    try:
+        cache_path = None
+        if cache_dir:
+            cache_path = os.path.join(cache_dir, f"{_ocr_cache_key(path, settings, config, regions)}.json")
+            if os.path.exists(cache_path):
+                with open(cache_path) as f:
+                    result.update(json.load(f), cached=True)
+                result["seconds"] = time.perf_counter() - start
+                return result
+
+        if regions:
+            result["regions"] = ocr_text_regions(path, config=config, **settings)
+            result["text"] = "\n".join(region["text"] for region in result["regions"])
+        else:
+            image = preprocess_image(path, **settings)
+            result["text"] = extract_data_from_image(image, config=config)
+
+        if cache_path:
+            _write_cache_entry(cache_path, {key: value for key, value in result.items() if key in ("text", "regions")})
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _ocr_cache_key(path, settings, config, regions=False):
+    """Hash of the image bytes plus everything that affects the OCR output."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(json.dumps([settings, config, regions, OCR_CACHE_VERSION], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _write_cache_entry(path, data):
+    # Write to a temporary file and rename it, so concurrent workers never see a partial entry
+    with atomic_write(path) as f:
+        json.dump(data, f)
@@ -0,0 +1,205 @@
+import json
+import os
+import random
+from xml.sax.saxutils import escape
+
+# Corpus sizes the benchmarks run at
+CORPUS_SIZES = {"1k": 1000, "10k": 10000, "100k": 100000}
+# Share of articles from each source; PubMed records are split across the keywords
+SOURCE_SHARES = {"PubMed": 0.5, "arXiv": 0.25, "CrossRef": 0.25}
+DUPLICATE_RATE = 0.1  # share of CrossRef records that repeat a PubMed paper
+BENCHMARK_KEYWORDS = ["longevity", "mitochondrial", "aging", "autophagy"]
+
+_TOPICS = ["mitochondrial dysfunction", "protein folding", "autophagy flux", "telomere attrition",
+           "senescent cells", "caloric restriction", "insulin signalling", "oxidative stress",
+           "stem cell exhaustion", "epigenetic clocks", "proteostasis", "NAD+ metabolism"]
+_DISEASES = ["Alzheimer's disease", "type 2 diabetes", "sarcopenia", "atherosclerosis",
+             "Parkinson's disease", "osteoporosis", "cancer", "heart failure"]
+_TREATMENTS = ["rapamycin", "metformin", "senolytic therapy", "exercise training",
+               "nicotinamide riboside", "spermidine", "gene therapy", "dietary restriction"]
+_MODELS = ["mice", "C. elegans", "human fibroblasts", "a cohort of 1,200 adults", "yeast", "zebrafish"]
+_SENTENCES = [
+    "We investigated the role of {topic} in {disease}.",
+    "Our method combined single-cell sequencing with longitudinal imaging in {model}.",
+    "The procedure involved treating {model} with {treatment} for twelve weeks.",
+    "Results showed that {treatment} reduced markers of {topic} by {percent}%.",
+    "A key finding was that {topic} predicted the onset of {disease}.",
+    "These effects were independent of age and sex.",
+    "Further work is needed to establish causality in humans.",
+    "Together, the data link {topic} to healthy lifespan.",
+]
+_SURNAMES = ["Smith", "Garcia", "Chen", "Kumar", "Müller", "Okafor", "Tanaka", "Rossi", "Nowak", "Silva"]
+_JOURNALS = ["Nature Aging", "Cell Metabolism", "Aging Cell", "eLife", "GeroScience", "PLOS Biology"]
+
+
+def make_corpus(size, seed=0, duplicate_rate=DUPLICATE_RATE):
+    """
+    Generates a deterministic synthetic corpus shaped like the pipeline's search results.
+
+    :param size: Number of articles.
+    :param seed: Random seed; the same seed always yields the same corpus.
+    :param duplicate_rate: Share of CrossRef records that repeat a PubMed paper with a
+                           differently formatted title, to exercise deduplication.
+    :return: List of article metadata dicts, with a 'pmid' on PubMed records.
+    """
+    rng = random.Random(seed)
+    counts = {source: int(size * share) for source, share in SOURCE_SHARES.items()}
+    counts["PubMed"] += size - sum(counts.values())
+
+    articles = []
+    for index in range(counts["PubMed"]):
+        article = _make_article(rng, "PubMed", index)
+        article["pmid"] = str(30000000 + index)
+        article["keyword"] = BENCHMARK_KEYWORDS[index % len(BENCHMARK_KEYWORDS)]
+        articles.append(article)
+    pubmed = list(articles)
+
+    for index in range(counts["arXiv"]):
+        article = _make_article(rng, "arXiv", index)
+        article["journal"] = "arXiv"
+        article["doi"] = f"http://arxiv.org/abs/{2400 + index // 10000}.{index % 10000:05d}v1"
+        articles.append(article)
+
+    for index in range(counts["CrossRef"]):
+        if pubmed and rng.random() < duplicate_rate:
+            original = rng.choice(pubmed)
+            article = dict(original, source="CrossRef", title=original["title"].upper() + ".",
+                           doi=f"https://doi.org/{original['doi']}")
+            article.pop("pmid", None)
+            article.pop("keyword", None)
+        else:
+            article = _make_article(rng, "CrossRef", index)
+        articles.append(article)
+    return articles
+
+
+def _make_article(rng, source, index):
+    fill = {
+        "topic": rng.choice(_TOPICS), "disease": rng.choice(_DISEASES), "treatment": rng.choice(_TREATMENTS),
+        "model": rng.choice(_MODELS), "percent": rng.randint(5, 60),
+    }
+    sentences = rng.sample(_SENTENCES, rng.randint(4, len(_SENTENCES)))
+    return {
+        "title": f"{fill['treatment'].capitalize()} and {fill['topic']} in {fill['disease']} ({source} {index})",
+        "abstract": " ".join(sentence.format(**fill) for sentence in sentences),
+        "authors": rng.sample(_SURNAMES, rng.randint(1, 5)),
+        "journal": rng.choice(_JOURNALS),
+        "doi": f"10.5555/{source.lower()}.{index}",
+        "source": source,
+    }
+
+
+def pubmed_efetch_xml(articles):
+    """
+    :param articles: PubMed articles from make_corpus.
+    :return: EFetch response body (bytes) for the articles.
+    """
+    records = []
+    for article in articles:
+        authors = "".join(f"<Author><LastName>{escape(name)}</LastName></Author>" for name in article["authors"])
+        records.append(
+            "<PubmedArticle><MedlineCitation>"
+            f"<PMID Version=\"1\">{article['pmid']}</PMID><Article>"
+            f"<Journal><Title>{escape(article['journal'])}</Title></Journal>"
+            f"<ArticleTitle>{escape(article['title'])}</ArticleTitle>"
+            f"<Abstract><AbstractText>{escape(article['abstract'])}</AbstractText></Abstract>"
+            f"<AuthorList>{authors}</AuthorList>"
+            f"<ELocationID EIdType=\"doi\">{escape(article['doi'])}</ELocationID>"
+            "</Article></MedlineCitation></PubmedArticle>"
+        )
+    return ("<?xml version=\"1.0\" ?><PubmedArticleSet>" + "".join(records) + "</PubmedArticleSet>").encode("utf-8")
+
+
+def esearch_json(pmids, count, retstart=0):
+    """
+    :param pmids: IDs on this page.
+    :param count: Total number of matching IDs.
+    :param retstart: Offset of the page.
+    :return: ESearch JSON response body (bytes).
+    """
+    return json.dumps({"esearchresult": {
+        "count": str(count), "retmax": str(len(pmids)), "retstart": str(retstart), "idlist": pmids,
+    }}).encode("utf-8")
+
+
+def epost_xml(web_env, query_key=1):
+    """
+    :return: EPost response body (bytes) for a history session.
+    """
+    return (f"<?xml version=\"1.0\" ?><ePostResult><QueryKey>{query_key}</QueryKey>"
+            f"<WebEnv>{web_env}</WebEnv></ePostResult>").encode("utf-8")
+
+
+def arxiv_atom(articles, total, start=0):
+    """
+    :param articles: arXiv articles on this page.
+    :param total: Total number of results.
+    :param start: Offset of the page.
+    :return: arXiv Atom feed body (bytes).
+    """
+    entries = []
+    for article in articles:
+        authors = "".join(f"<author><name>{escape(name)}</name></author>" for name in article["authors"])
+        entries.append(
+            f"<entry><id>{escape(article['doi'])}</id><title>{escape(article['title'])}</title>"
+            f"<summary>{escape(article['abstract'])}</summary>{authors}</entry>"
+        )
+    return (
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+        "<feed xmlns=\"http://www.w3.org/2005/Atom\" xmlns:opensearch=\"http://a9.com/-/spec/opensearch/1.1/\">"
+        f"<opensearch:totalResults>{total}</opensearch:totalResults>"
+        f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+        + "".join(entries) + "</feed>"
+    ).encode("utf-8")
+
+
+def crossref_json(articles, total, next_cursor=None):
+    """
+    :param articles: CrossRef articles on this page.
+    :param total: Total number of results.
+    :param next_cursor: Cursor for the next page, if any.
+    :return: CrossRef works response body (bytes).
+    """
+    items = [
+        {
+            "DOI": article["doi"],
+            "title": [article["title"]],
+            "abstract": article["abstract"],
+            "author": [{"family": name} for name in article["authors"]],
+            "container-title": [article["journal"]],
+        }
+        for article in articles
+    ]
+    message = {"total-results": total, "items-per-page": len(items), "items": items}
+    if next_cursor:
+        message["next-cursor"] = next_cursor
+    return json.dumps({"status": "ok", "message-type": "work-list", "message": message}).encode("utf-8")
+
+
+def write_fixtures(directory, size=100, seed=0):
+    """
+    Writes one response fixture per service for a small corpus, for inspecting the
+    payloads the stub servers produce or replaying them with other tools.
+
+    :param directory: Output directory.
+    :param size: Corpus size.
+    :param seed: Corpus seed.
+    :return: List of written paths.
+    """
+    corpus = make_corpus(size, seed)
+    by_source = {source: [article for article in corpus if article["source"] == source] for source in SOURCE_SHARES}
+    fixtures = {
+        "esearch.json": esearch_json([a["pmid"] for a in by_source["PubMed"]], len(by_source["PubMed"])),
+        "efetch.xml": pubmed_efetch_xml(by_source["PubMed"]),
+        "epost.xml": epost_xml("MCID_fixture"),
+        "arxiv.atom": arxiv_atom(by_source["arXiv"], len(by_source["arXiv"])),
+        "crossref.json": crossref_json(by_source["CrossRef"], len(by_source["CrossRef"])),
+    }
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, body in fixtures.items():
+        path = os.path.join(directory, name)
+        with open(path, "wb") as f:
+            f.write(body)
+        paths.append(path)
+    return paths
@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import-time budgets in milliseconds, as reported by `python -X importtime`
+IMPORT_BUDGETS_MS = {
+    "Phase1": 500,
+    "Phase2": 200,
+    "Phase3": 3000,
+    "Phase4": 2000,
+    "semantic_index": 500,
+    "gazetteer": 100,
+}
+
+# Heavy modules that must not be loaded just by importing a phase
+FORBIDDEN_IMPORTS = {
+    "Phase1": ["spacy", "transformers", "cv2", "pytesseract", "rdflib", "matplotlib", "pandas", "numpy"],
+    "Phase2": ["spacy", "transformers", "openai", "langchain_ollama", "torch"],
+    "Phase3": ["sklearn", "transformers"],
+    "Phase4": ["openai", "transformers"],
+    "semantic_index": ["sentence_transformers", "torch", "transformers"],
+    "gazetteer": ["spacy"],
+}
+
+
+def measure_import(module, repeat=3):
+    """
+    Imports a module in fresh interpreters and measures how long the import takes.
+
+    :param module: Name of the module to import.
+    :param repeat: Number of fresh imports; the fastest one is reported.
+    :return: Tuple of (best cumulative import time in ms, set of loaded module names).
+    """
+    code = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    best = None
+    loaded = set()
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=REPO_ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if line.startswith("import time:") and len(fields) == 3 and fields[2].strip() == module:
+                cumulative_ms = int(fields[1]) / 1000
+                best = cumulative_ms if best is None else min(best, cumulative_ms)
+        loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    return best, loaded
+
+
+def main(modules=None):
+    """
+    Checks every phase against its import-time budget and forbidden-import list.
+
+    :param modules: Module names to check; defaults to all phases.
+    :return: Process exit status (1 if any check failed).
+    """
+    failed = False
+    for module in modules or IMPORT_BUDGETS_MS:
+        try:
+            elapsed_ms, loaded = measure_import(module)
+        except RuntimeError as e:
+            print(f"{module:8} FAIL  import error: {e}")
+            failed = True
+            continue
+
+        problems = []
+        if elapsed_ms > IMPORT_BUDGETS_MS.get(module, float("inf")):
+            problems.append(f"over budget of {IMPORT_BUDGETS_MS[module]} ms")
+        heavy = [name for name in FORBIDDEN_IMPORTS.get(module, []) if name in loaded]
+        if heavy:
+            problems.append(f"imports {', '.join(heavy)}")
+
+        status = "FAIL" if problems else "ok"
+        print(f"{module:8} {status:5} {elapsed_ms:8.1f} ms  {'; '.join(problems)}")
+        failed = failed or bool(problems)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,423 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path[:0] = [BENCHMARK_DIR, REPO_ROOT]
+
+from corpus import make_corpus, pubmed_efetch_xml, arxiv_atom, CORPUS_SIZES, BENCHMARK_KEYWORDS
+from stub_servers import StubServices
+
+# Results are stored per commit so runs on different commits can be compared
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+REGRESSION_THRESHOLD = 1.10  # a benchmark regressed if it takes 10% longer than the baseline
+DEFAULT_SCALES = ["1k", "10k"]
+
+# Caps for benchmarks whose cost is dominated by the stubs' simulated latency or by Tesseract
+LLM_BENCH_ARTICLES = 200
+OCR_BENCH_IMAGES = 50
+INDEX_BENCH_QUERIES = 100
+E2E_MAX_RESULTS = 5
+
+BENCHMARKS = {}
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark's setup when its dependencies are missing."""
+
+
+def benchmark(name):
+    """
+    Registers a benchmark. The decorated function does the untimed setup and returns a
+    zero-argument callable that runs the timed work and returns the number of items processed.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class BenchmarkContext:
+    """Corpus, stub services and scratch directory shared by the benchmarks of one scale."""
+
+    def __init__(self, corpus, services, work_dir):
+        self.corpus = corpus
+        self.services = services
+        self.work_dir = work_dir
+        self.by_source = {}
+        for article in corpus:
+            self.by_source.setdefault(article["source"], []).append(article)
+        self._harmonized = None
+
+    def scratch(self, name):
+        path = os.path.join(self.work_dir, f"{name}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(path)
+        return path
+
+    def harmonized(self):
+        if self._harmonized is None:
+            import pandas as pd
+            from Phase3 import harmonize_data
+            self._harmonized = harmonize_data([pd.DataFrame(self.corpus)])
+        return self._harmonized
+
+
+# Phase 1
+@benchmark("phase1.search")
+def bench_search(ctx):
+    from Phase1 import search_academic_sources
+    return lambda: len(search_academic_sources(BENCHMARK_KEYWORDS, max_results=len(ctx.corpus), pubmed_bulk=True))
+
+
+@benchmark("phase1.parse_pubmed")
+def bench_parse_pubmed(ctx):
+    from Phase1 import iter_pubmed_articles
+    payload = pubmed_efetch_xml(ctx.by_source["PubMed"])
+    return lambda: sum(1 for _ in iter_pubmed_articles(payload))
+
+
+@benchmark("phase1.parse_arxiv")
+def bench_parse_arxiv(ctx):
+    from Phase1 import iter_arxiv_entries
+    payload = arxiv_atom(ctx.by_source["arXiv"], len(ctx.by_source["arXiv"]))
+    return lambda: sum(1 for _ in iter_arxiv_entries(payload))
+
+
+@benchmark("phase1.dedup")
+def bench_dedup(ctx):
+    from Phase1 import deduplicate_articles
+
+    def run():
+        deduplicate_articles([dict(article) for article in ctx.corpus])
+        return len(ctx.corpus)
+    return run
+
+
+# Phase 2
+def _require_spacy_model():
+    from Phase2 import get_nlp
+    try:
+        get_nlp()
+    except OSError as e:
+        raise SkipBenchmark(f"spaCy model not installed ({e})")
+
+
+@benchmark("phase2.extract")
+def bench_extract(ctx):
+    from Phase2 import extract_key_information_batch
+    _require_spacy_model()
+    abstracts = [article["abstract"] for article in ctx.corpus]
+    return lambda: sum(1 for _ in extract_key_information_batch(abstracts))
+
+
+@benchmark("phase2.gazetteer")
+def bench_gazetteer(ctx):
+    from gazetteer import load_gazetteer
+    gazetteer = load_gazetteer(cache_path=os.path.join(ctx.scratch("gazetteer"), "gazetteer.pickle"))
+    abstracts = [article["abstract"] for article in ctx.corpus]
+
+    def run():
+        for abstract in abstracts:
+            gazetteer.find(abstract)
+        return len(abstracts)
+    return run
+
+
+@benchmark("phase2.llm")
+def bench_llm(ctx):
+    import langchain_ollama  # noqa: F401 - skip early when the client isn't installed
+    from Phase2 import process_articles
+    _require_spacy_model()
+    articles = ctx.corpus[:LLM_BENCH_ARTICLES]
+    return lambda: sum(1 for _ in process_articles(articles))
+
+
+@benchmark("phase2.summarize_long")
+def bench_summarize_long(ctx):
+    import langchain_ollama  # noqa: F401
+    from Phase2 import summarize_long_text
+    _require_spacy_model()
+    text = "\n\n".join(article["abstract"] for article in ctx.corpus[:200])
+
+    def run():
+        summarize_long_text(text)
+        return 1
+    return run
+
+
+# Phase 3
+@benchmark("phase3.harmonize")
+def bench_harmonize(ctx):
+    import pandas as pd
+    from Phase3 import harmonize_data
+    data_frame = pd.DataFrame(ctx.corpus)
+    return lambda: len(harmonize_data([data_frame]))
+
+
+@benchmark("phase3.mapping")
+def bench_mapping(ctx):
+    from Phase3 import ontology_mapping
+    harmonized = ctx.harmonized()
+
+    def run():
+        ontology_mapping(harmonized)
+        return len(harmonized)
+    return run
+
+
+@benchmark("phase3.export")
+def bench_export(ctx):
+    from Phase3 import ontology_mapping, export_graph
+    graph = ontology_mapping(ctx.harmonized())
+    path = os.path.join(ctx.scratch("export"), "graph.nt")
+    return lambda: export_graph(graph, path)
+
+
+@benchmark("phase3.parquet")
+def bench_parquet(ctx):
+    import pyarrow  # noqa: F401
+    from Phase3 import write_harmonized_dataset, read_harmonized_dataset
+    harmonized = ctx.harmonized()
+    root = os.path.join(ctx.scratch("parquet"), "dataset")
+
+    def run():
+        write_harmonized_dataset(harmonized, root, overwrite=True)
+        return len(read_harmonized_dataset(root))
+    return run
+
+
+# Phase 4
+def _chart_images(ctx, count):
+    import cv2
+    import numpy as np
+    if shutil.which("tesseract") is None:
+        raise SkipBenchmark("tesseract binary not installed")
+
+    directory = ctx.scratch("charts")
+    for index in range(count):
+        image = np.full((400, 700, 3), 255, np.uint8)
+        cv2.putText(image, f"Figure {index}: lifespan by treatment", (120, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+        for bar in range(4):
+            height = 60 + (index * 37 + bar * 53) % 200
+            cv2.rectangle(image, (150 + bar * 120, 350 - height), (220 + bar * 120, 350), (80, 80, 80), -1)
+            cv2.putText(image, f"G{bar + 1}", (170 + bar * 120, 375), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+        cv2.imwrite(os.path.join(directory, f"chart_{index}.png"), image)
+    return directory
+
+
+@benchmark("phase4.ocr")
+def bench_ocr(ctx):
+    from Phase4 import ocr_images
+    directory = _chart_images(ctx, min(OCR_BENCH_IMAGES, len(ctx.corpus)))
+    return lambda: sum(1 for _ in ocr_images(directory, cache_dir=None))
+
+
+@benchmark("phase4.ocr_regions")
+def bench_ocr_regions(ctx):
+    from Phase4 import ocr_images
+    directory = _chart_images(ctx, min(OCR_BENCH_IMAGES, len(ctx.corpus)))
+    return lambda: sum(1 for _ in ocr_images(directory, cache_dir=None, regions=True))
+
+
+# Semantic index
+@benchmark("index.build")
+def bench_index_build(ctx):
+    from semantic_index import SemanticIndex, HashingEmbedder
+    return lambda: SemanticIndex(ctx.scratch("index"), embedder=HashingEmbedder()).add(ctx.corpus)
+
+
+@benchmark("index.search")
+def bench_index_search(ctx):
+    from semantic_index import SemanticIndex, HashingEmbedder
+    index = SemanticIndex(ctx.scratch("index"), embedder=HashingEmbedder())
+    index.add(ctx.corpus)
+    queries = [article["title"] for article in ctx.corpus[:INDEX_BENCH_QUERIES]]
+
+    def run():
+        for query in queries:
+            index.search(query, k=10)
+        return len(queries)
+    return run
+
+
+# End to end
+@benchmark("e2e.main")
+def bench_main(ctx):
+    import cv2  # noqa: F401
+    import langchain_ollama  # noqa: F401
+    import matplotlib
+    _require_spacy_model()
+    matplotlib.use("Agg")
+    import run_researchassistai
+
+    work_dir = ctx.scratch("e2e")
+    shutil.copy(os.path.join(_chart_images(ctx, 1), "chart_0.png"), os.path.join(work_dir, "example_chart.png"))
+
+    def run():
+        # main writes its stores relative to the working directory
+        previous = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            run_researchassistai.main(BENCHMARK_KEYWORDS, E2E_MAX_RESULTS, run_dir=f"run-{uuid.uuid4().hex[:8]}")
+        finally:
+            os.chdir(previous)
+        return 1
+    return run
+
+
+def run_benchmarks(scales, names, repeat=3, latency=None, real_rate_limits=False):
+    """
+    Runs the selected benchmarks at each scale against fresh stub services.
+
+    :param scales: Corpus size names from CORPUS_SIZES.
+    :param names: Benchmark names (or prefixes such as 'phase1') to run.
+    :param repeat: Timed runs per benchmark; the fastest is kept.
+    :param latency: Seconds added to each stub response, per service.
+    :param real_rate_limits: Throttle the stubs with the production rate limits.
+    :return: Dict of results keyed on 'name@scale'.
+    """
+    results = {}
+    for scale in scales:
+        corpus = make_corpus(CORPUS_SIZES[scale])
+        with StubServices(corpus, latency) as services, tempfile.TemporaryDirectory() as work_dir:
+            services.configure_pipeline(real_rate_limits)
+            ctx = BenchmarkContext(corpus, services, work_dir)
+            for name, setup in BENCHMARKS.items():
+                if names and not any(name == selected or name.startswith(f"{selected}.") for selected in names):
+                    continue
+                key = f"{name}@{scale}"
+                result = _run_one(setup, ctx, 1 if name.startswith("e2e.") else repeat)
+                results[key] = result
+                if "skipped" in result:
+                    print(f"{key:28} skipped: {result['skipped']}")
+                else:
+                    print(f"{key:28} {result['seconds']:10.4f} s  {result['items_per_second']:12.1f} items/s")
+    return results
+
+
+def _run_one(setup, ctx, repeat):
+    # The pipeline prints progress for every article; keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            run = setup(ctx)
+        except (ImportError, SkipBenchmark) as e:
+            return {"skipped": str(e)}
+
+        best, items = None, 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            items = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    return {"seconds": best, "items": items, "items_per_second": items / best if best else 0.0}
+
+
+def _git(*args):
+    result = subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def save_results(results):
+    """
+    Merges results into the file of the current commit.
+
+    :param results: Results from run_benchmarks.
+    :return: Path of the results file.
+    """
+    commit = _git("rev-parse", "HEAD") or "unknown"
+    path = os.path.join(RESULTS_DIR, f"{commit}.json")
+    stored = {"commit": commit, "results": {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            stored = json.load(f)
+    stored.update({
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "updated": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cores)",
+    })
+    stored["results"].update(results)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(stored, f, indent=2, sort_keys=True)
+    return path
+
+
+def compare_results(results, baseline_ref, threshold=REGRESSION_THRESHOLD):
+    """
+    Compares results with those stored for another commit.
+
+    :param results: Results from run_benchmarks.
+    :param baseline_ref: Git revision whose stored results are the baseline.
+    :param threshold: Slowdown ratio counted as a regression.
+    :return: True if any benchmark regressed.
+    """
+    commit = _git("rev-parse", baseline_ref)
+    path = os.path.join(RESULTS_DIR, f"{commit}.json")
+    if commit is None or not os.path.exists(path):
+        print(f"No stored results for {baseline_ref}")
+        return False
+    with open(path) as f:
+        baseline = json.load(f)["results"]
+
+    print(f"\nCompared with {baseline_ref} ({commit[:10]}):")
+    regressed = False
+    for key, result in sorted(results.items()):
+        before = baseline.get(key, {})
+        if "seconds" not in result or "seconds" not in before:
+            continue
+        ratio = result["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+        status = "REGRESSED" if ratio > threshold else "ok"
+        regressed = regressed or ratio > threshold
+        print(f"{key:28} {before['seconds']:10.4f} s -> {result['seconds']:10.4f} s  x{ratio:5.2f}  {status}")
+    return regressed
+
+
+def main(argv=None):
+    """
+    Runs the offline benchmark suite against local stub services, stores the results
+    under benchmarks/results/<commit>.json and optionally compares them with another commit.
+
+    :return: Process exit status (1 if a benchmark regressed against the baseline).
+    """
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the ResearchAssistAI pipeline.")
+    parser.add_argument("names", nargs="*", help="benchmarks or prefixes to run, e.g. phase1 or phase3.mapping")
+    parser.add_argument("--scale", action="append", choices=CORPUS_SIZES, help="corpus size (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark; the fastest is kept")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every stub response")
+    parser.add_argument("--real-rate-limits", action="store_true", help="throttle stubs like the real services")
+    parser.add_argument("--compare", metavar="REF", help="git revision to compare against")
+    parser.add_argument("--no-save", action="store_true", help="don't store the results")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    # Per-request INFO logging from the phases and HTTP clients would swamp the report
+    logging.disable(logging.INFO)
+    latency = {service: args.latency for service in ("pubmed", "arxiv", "crossref", "ollama")}
+    results = run_benchmarks(args.scale or DEFAULT_SCALES, args.names, args.repeat, latency, args.real_rate_limits)
+    # Compare before saving, so comparing with HEAD uses the previously stored run
+    regressed = bool(args.compare) and compare_results(results, args.compare)
+    if not args.no_save:
+        print(f"\nResults stored in {save_results(results)}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import (make_corpus, pubmed_efetch_xml, esearch_json, epost_xml, arxiv_atom, crossref_json,
+                    CORPUS_SIZES)
+
+# Default latency added to every response, in seconds, per service
+DEFAULT_LATENCY = {"pubmed": 0.0, "arxiv": 0.0, "crossref": 0.0, "ollama": 0.0}
+# Simulated completion length and generation speed of the Ollama stub
+OLLAMA_COMPLETION_TOKENS = 120
+OLLAMA_TOKENS_PER_SECOND = 0  # 0 sends the completion without delay
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Routes requests to the service the server was started for."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle(parse_qs(urlparse(self.path).query))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            self._handle(json.loads(body or b"{}"))
+        else:
+            self._handle(parse_qs(body.decode("utf-8")))
+
+    def _handle(self, params):
+        service = self.server.service
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        path = urlparse(self.path).path
+        handler = getattr(self, f"_{service}", None)
+        if handler is None:
+            self._send(404, b"unknown service", "text/plain")
+        else:
+            handler(path, params)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # E-utilities
+    def _pubmed(self, path, params):
+        data = self.server.data
+        if path.endswith("esearch.fcgi"):
+            term = _param(params, "term", "")
+            matches = data["by_keyword"].get(term, data["pubmed_ids"])
+            start, count = int(_param(params, "retstart", 0)), int(_param(params, "retmax", 20))
+            self._send(200, esearch_json(matches[start:start + count], len(matches), start), "application/json")
+        elif path.endswith("epost.fcgi"):
+            web_env = f"MCID_{uuid.uuid4().hex}"
+            with self.server.lock:
+                data["sessions"][web_env] = _param(params, "id", "").split(",")
+            self._send(200, epost_xml(web_env), "text/xml")
+        elif path.endswith("efetch.fcgi"):
+            if "WebEnv" in params:
+                ids = data["sessions"].get(_param(params, "WebEnv"), [])
+                start, count = int(_param(params, "retstart", 0)), int(_param(params, "retmax", 20))
+                ids = ids[start:start + count]
+            else:
+                ids = _param(params, "id", "").split(",")
+            articles = [data["pubmed"][pmid] for pmid in ids if pmid in data["pubmed"]]
+            self._send(200, pubmed_efetch_xml(articles), "text/xml")
+        else:
+            self._send(404, b"unknown E-utility", "text/plain")
+
+    # arXiv API
+    def _arxiv(self, path, params):
+        articles = self.server.data["arxiv"]
+        start, count = int(_param(params, "start", 0)), int(_param(params, "max_results", 10))
+        self._send(200, arxiv_atom(articles[start:start + count], len(articles), start), "application/atom+xml")
+
+    # CrossRef REST API
+    def _crossref(self, path, params):
+        articles = self.server.data["crossref"]
+        cursor = _param(params, "cursor", "*")
+        start = 0 if cursor in ("*", None) else int(cursor.lstrip("o"))
+        count = int(_param(params, "rows", 20))
+        page = articles[start:start + count]
+        next_cursor = f"o{start + len(page)}" if start + len(page) < len(articles) else None
+        self._send(200, crossref_json(page, len(articles), next_cursor), "application/json")
+
+    # Ollama chat API
+    def _ollama(self, path, params):
+        if not path.endswith("/api/chat"):
+            self._send(404, b'{"error": "not found"}', "application/json")
+            return
+        words = ["The", "study", "links", "cellular", "ageing", "to", "metabolic", "decline."]
+        tokens = [words[i % len(words)] + " " for i in range(self.server.completion_tokens)]
+        tokens_per_second = self.server.tokens_per_second
+        model = params.get("model", "stub")
+        created = datetime.now(timezone.utc).isoformat()
+        final = {"model": model, "created_at": created, "message": {"role": "assistant", "content": ""},
+                 "done": True, "done_reason": "stop", "prompt_eval_count": 0, "eval_count": len(tokens),
+                 "total_duration": 0, "eval_duration": 0}
+
+        if not params.get("stream", True):
+            if tokens_per_second:
+                time.sleep(len(tokens) / tokens_per_second)
+            final["message"]["content"] = "".join(tokens).strip()
+            self._send(200, json.dumps(final).encode("utf-8"), "application/json")
+            return
+
+        # Stream NDJSON chunks like the real server, one line per token
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            if tokens_per_second:
+                time.sleep(1 / tokens_per_second)
+            self._write_chunk({"model": model, "created_at": created,
+                               "message": {"role": "assistant", "content": token}, "done": False})
+        self._write_chunk(final)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, obj):
+        line = json.dumps(obj).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+
+
+def _param(params, name, default=None):
+    value = params.get(name, default)
+    return value[0] if isinstance(value, list) else value
+
+
+def _service_data(corpus):
+    pubmed = [article for article in corpus if article["source"] == "PubMed"]
+    by_keyword = {}
+    for article in pubmed:
+        by_keyword.setdefault(article["keyword"], []).append(article["pmid"])
+    return {
+        "pubmed": {article["pmid"]: article for article in pubmed},
+        "pubmed_ids": [article["pmid"] for article in pubmed],
+        "by_keyword": by_keyword,
+        "sessions": {},
+        "arxiv": [article for article in corpus if article["source"] == "arXiv"],
+        "crossref": [article for article in corpus if article["source"] == "CrossRef"],
+    }
+
+
+class StubServices:
+    """
+    Local stand-ins for E-utilities, the arXiv API, the CrossRef REST API and the
+    Ollama chat endpoint, each on its own port so per-host rate limiting applies as in
+    production. Use as a context manager.
+    """
+
+    def __init__(self, corpus, latency=None, completion_tokens=OLLAMA_COMPLETION_TOKENS,
+                 tokens_per_second=OLLAMA_TOKENS_PER_SECOND):
+        """
+        :param corpus: Articles to serve, from corpus.make_corpus.
+        :param latency: Seconds added to each response, per service name.
+        :param completion_tokens: Length of every Ollama completion.
+        :param tokens_per_second: Simulated Ollama generation speed; 0 for no delay.
+        """
+        self.data = _service_data(corpus)
+        self.latency = {**DEFAULT_LATENCY, **(latency or {})}
+        self.completion_tokens = completion_tokens
+        self.tokens_per_second = tokens_per_second
+        self.servers = {}
+        self._threads = []
+
+    def __enter__(self):
+        lock = threading.Lock()
+        for service in DEFAULT_LATENCY:
+            server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+            server.daemon_threads = True
+            server.service = service
+            server.latency = self.latency[service]
+            server.data = self.data
+            server.lock = lock
+            server.completion_tokens = self.completion_tokens
+            server.tokens_per_second = self.tokens_per_second
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self.servers[service] = server
+            self._threads.append(thread)
+        return self
+
+    def __exit__(self, *exc_info):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+        return False
+
+    def url(self, service):
+        host, port = self.servers[service].server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure_pipeline(self, real_rate_limits=False):
+        """
+        Points Phase1's endpoints and Ollama clients at the stubs and turns off the
+        response and completion caches, so every call goes over HTTP.
+
+        :param real_rate_limits: Apply each service's production rate limit to its stub;
+                                 by default stubs are not throttled.
+        """
+        import Phase1
+        import Phase2
+
+        pubmed, arxiv, crossref = self.url("pubmed"), self.url("arxiv"), self.url("crossref")
+        Phase1.ESEARCH_URL = f"{pubmed}/entrez/eutils/esearch.fcgi"
+        Phase1.EFETCH_URL = f"{pubmed}/entrez/eutils/efetch.fcgi"
+        Phase1.EPOST_URL = f"{pubmed}/entrez/eutils/epost.fcgi"
+        Phase1.ARXIV_URL = f"{arxiv}/api/query"
+        Phase1.CROSSREF_URL = f"{crossref}/works"
+
+        real_hosts = {"pubmed": "eutils.ncbi.nlm.nih.gov", "arxiv": "export.arxiv.org", "crossref": "api.crossref.org"}
+        for service, real_host in real_hosts.items():
+            host = urlparse(self.url(service)).netloc
+            Phase1.HOST_SOURCES[host] = Phase1.HOST_SOURCES[real_host]
+            Phase1.HOST_RATE_LIMITS[host] = Phase1.HOST_RATE_LIMITS[real_host] if real_rate_limits else float("inf")
+        Phase1._rate_limiters.clear()
+        Phase1.configure_response_cache(mode="off")
+
+        os.environ["OLLAMA_HOST"] = self.url("ollama")
+        Phase2._models.pop("summarizer", None)
+        Phase2._models.pop("chat_model", None)
+        Phase2.configure_llm_cache(enabled=False)
+
+
+def main(argv=None):
+    """Serves the stubs until interrupted, for pointing other tools at them."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--size", choices=CORPUS_SIZES, default="1k", help="corpus size to serve")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--tokens-per-second", type=float, default=OLLAMA_TOKENS_PER_SECOND,
+                        help="simulated Ollama generation speed (0 for no delay)")
+    args = parser.parse_args(argv)
+
+    latency = {service: args.latency for service in DEFAULT_LATENCY}
+    with StubServices(make_corpus(CORPUS_SIZES[args.size]), latency,
+                      tokens_per_second=args.tokens_per_second) as services:
+        for service in DEFAULT_LATENCY:
+            print(f"{service:9} {services.url(service)}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
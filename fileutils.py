@@ -0,0 +1,30 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode="w"):
+    """
+    Opens a temporary file next to path and renames it into place when the block ends,
+    so readers, concurrent writers and crashes never see a half-written file. If the
+    block raises, the temporary file is removed and path is left as it was.
+
+    :param path: Destination file path; missing directories are created.
+    :param mode: "w" for text or "wb" for binary data.
+    :return: Context manager yielding the open temporary file.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # No suffix, so collectors that glob on the extension (e.g. *.prom) skip the temporary file
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
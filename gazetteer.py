@@ -0,0 +1,171 @@
+import glob
+import os
+import pickle
+import re
+from fileutils import atomic_write
+
+# Term files: every *.txt file in a label's subdirectory is loaded into that label
+GAZETTEER_DIR = os.environ.get(
+    "RESEARCHASSISTAI_GAZETTEER_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteers"))
+GAZETTEER_LABELS = {"DISEASES": "diseases", "TREATMENTS": "treatments"}
+# Compiled matcher, rebuilt whenever a term file is added, removed or modified
+GAZETTEER_CACHE_PATH = os.path.join(".cache", "gazetteer.pickle")
+GAZETTEER_CACHE_VERSION = 2
+
+# Terms and texts are split the same way, before lower-casing each token: runs of word
+# characters, and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Trie edges are keyed on (node << _NODE_SHIFT) | token id
+_NODE_SHIFT = 32
+
+
+class Gazetteer:
+    """
+    Dictionary matcher for large term lists. Terms are stored in a trie over lower-cased
+    tokens, and a text is scanned once, taking the longest term that starts at each
+    token. The work per token is bounded by the length of the longest term, so matching
+    costs the same whether the vocabulary holds a hundred terms or a million.
+
+    The trie is kept flat, as integer-keyed dicts rather than nested ones, so that it
+    unpickles several times faster than it can be rebuilt.
+    """
+
+    def __init__(self):
+        self._token_ids = {}
+        self._edges = {}  # edge key -> child node; the root is node 0
+        self._labels = {}  # node -> labels of the term ending there
+        self._node_count = 1
+
+    def __len__(self):
+        return len(self._labels)
+
+    def add(self, term, label):
+        """
+        Adds a term.
+
+        :param term: Term text; matching ignores case and whitespace differences.
+        :param label: Label the term is reported under.
+        """
+        tokens = [token.lower() for token in TOKEN_PATTERN.findall(term)]
+        if not tokens:
+            return
+        node = 0
+        for token in tokens:
+            token_id = self._token_ids.setdefault(token, len(self._token_ids))
+            key = (node << _NODE_SHIFT) | token_id
+            child = self._edges.get(key)
+            if child is None:
+                child = self._edges[key] = self._node_count
+                self._node_count += 1
+            node = child
+        labels = self._labels.get(node, ())
+        if label not in labels:
+            self._labels[node] = labels + (label,)
+
+    def find(self, text):
+        """
+        Finds the terms in a text, leftmost-longest and without overlaps.
+
+        :param text: Text to scan.
+        :return: List of (label, start, end, matched text) tuples in text order; a term
+                 listed under several labels is reported once per label.
+        """
+        token_ids, edges, term_labels = self._token_ids, self._edges, self._labels
+        # Lower-case token by token; lowering the whole text can change its length and shift offsets
+        spans = [(token_ids.get(match.group().lower(), -1), match.start(), match.end())
+                 for match in TOKEN_PATTERN.finditer(text)]
+        matches = []
+        i = 0
+        while i < len(spans):
+            last = labels = None
+            node = 0
+            j = i
+            while j < len(spans) and spans[j][0] >= 0:
+                node = edges.get((node << _NODE_SHIFT) | spans[j][0])
+                if node is None:
+                    break
+                if node in term_labels:
+                    last, labels = j, term_labels[node]
+                j += 1
+            if last is None:
+                i += 1
+                continue
+            start, end = spans[i][1], spans[last][2]
+            for label in labels:
+                matches.append((label, start, end, text[start:end]))
+            i = last + 1
+        return matches
+
+
+def term_files(directory=GAZETTEER_DIR, labels=GAZETTEER_LABELS):
+    """
+    :param directory: Gazetteer directory.
+    :param labels: Mapping of label to the subdirectory holding its term files.
+    :return: Sorted list of (label, path) tuples.
+    """
+    files = []
+    for label, subdirectory in labels.items():
+        for path in sorted(glob.glob(os.path.join(directory, subdirectory, "*.txt"))):
+            files.append((label, path))
+    return files
+
+
+def read_terms(path):
+    """
+    Reads a term file: one term per line, UTF-8. Blank lines and lines starting with '#'
+    are skipped, and only the first tab-separated column is used, so exports that list
+    an identifier after each term can be used as they are.
+
+    :param path: Term file path.
+    :return: Generator of terms.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            term = line.split("\t", 1)[0].strip()
+            if term and not term.startswith("#"):
+                yield term
+
+
+def build_gazetteer(files):
+    """
+    :param files: List of (label, path) tuples, as returned by term_files.
+    :return: Gazetteer holding the terms of all files.
+    """
+    gazetteer = Gazetteer()
+    for label, path in files:
+        for term in read_terms(path):
+            gazetteer.add(term, label)
+    return gazetteer
+
+
+def load_gazetteer(directory=GAZETTEER_DIR, cache_path=GAZETTEER_CACHE_PATH):
+    """
+    Returns the gazetteer for the term files in directory, loading the compiled matcher
+    from cache_path when it was built from the same files (by path, size and
+    modification time) and rebuilding and caching it otherwise.
+
+    :param directory: Gazetteer directory.
+    :param cache_path: Path of the pickled matcher; None disables the cache.
+    :return: Gazetteer; empty if there are no term files.
+    """
+    files = term_files(directory)
+    fingerprint = [GAZETTEER_CACHE_VERSION]
+    for label, path in files:
+        stat = os.stat(path)
+        fingerprint.append((label, os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                cached_fingerprint, gazetteer = pickle.load(f)
+            if cached_fingerprint == fingerprint:
+                return gazetteer
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError) as e:
+            print(f"Ignoring unreadable gazetteer cache {cache_path}: {e}")
+
+    gazetteer = build_gazetteer(files)
+    print(f"Gazetteer: compiled {len(gazetteer)} terms from {len(files)} files")
+    if cache_path:
+        with atomic_write(cache_path, "wb") as f:
+            pickle.dump((fingerprint, gazetteer), f, protocol=pickle.HIGHEST_PROTOCOL)
+    return gazetteer
@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from fileutils import atomic_write
+
+# Prometheus textfile written at the end of a run when set, e.g. for node_exporter's textfile collector
+PROMETHEUS_TEXTFILE = os.environ.get("RESEARCHASSISTAI_PROMETHEUS_TEXTFILE")
+METRIC_PREFIX = "researchassistai_"
+
+# Throughputs derived in the summary: name -> (item counter, timing of the work)
+THROUGHPUTS = {
+    "spacy_docs_per_second": ("spacy_docs", "spacy_doc_seconds"),
+    "llm_tokens_per_second": ("llm_completion_tokens", "llm_call_seconds"),
+    "rdf_triples_per_second": ("rdf_triples", "rdf_mapping_seconds"),
+}
+
+
+class Metrics:
+    """
+    Thread-safe in-process registry of counters and timings. Each metric is keyed on
+    its name and labels; timings keep count, sum, min and max.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+
+    def inc(self, name, value=1, **labels):
+        """
+        Adds to a counter.
+
+        :param name: Metric name.
+        :param value: Amount to add.
+        :param labels: Label values, e.g. source='PubMed'.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """
+        Records one timing.
+
+        :param name: Metric name, ending in _seconds.
+        :param seconds: Duration.
+        :param labels: Label values.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                self._timings[key] = [1, seconds, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = min(timing[2], seconds)
+                timing[3] = max(timing[3], seconds)
+
+    def timer(self, name, **labels):
+        """
+        :param name: Metric name, ending in _seconds.
+        :param labels: Label values.
+        :return: Context manager that records the duration of its block.
+        """
+        return _Timer(self, name, labels)
+
+    def summary(self):
+        """
+        :return: JSON-serializable dict of counters, timings and derived throughputs.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {key: list(value) for key, value in self._timings.items()}
+
+        throughputs = []
+        for name, (counter, timing) in THROUGHPUTS.items():
+            for (timing_name, labels), (count, total, _, _) in timings.items():
+                if timing_name == timing and total > 0:
+                    items = counters.get((counter, labels), 0)
+                    throughputs.append({"name": name, "labels": dict(labels), "value": items / total})
+
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+            "timings": [
+                {"name": name, "labels": dict(labels), "count": count, "sum": total,
+                 "mean": total / count, "min": low, "max": high}
+                for (name, labels), (count, total, low, high) in sorted(timings.items())
+            ],
+            "throughputs": throughputs,
+        }
+
+    def write_json(self, path):
+        """
+        Writes the summary as JSON.
+
+        :param path: Output file path.
+        """
+        with atomic_write(path) as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_prometheus(self, path):
+        """
+        Writes the metrics in the Prometheus text exposition format: counters as
+        <name>_total and timings as summaries with _count and _sum. The file is
+        replaced atomically, as the textfile collector requires.
+
+        :param path: Output file path, normally ending in .prom.
+        """
+        summary = self.summary()
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                lines.append(f"# TYPE {name} {kind}")
+                declared.add(name)
+
+        def add(name, labels, value):
+            label_text = ",".join(f'{key}="{_escape_label(label)}"' for key, label in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        for counter in summary["counters"]:
+            name = f"{METRIC_PREFIX}{counter['name']}_total"
+            declare(name, "counter")
+            add(name, counter["labels"], counter["value"])
+        for timing in summary["timings"]:
+            name = f"{METRIC_PREFIX}{timing['name']}"
+            declare(name, "summary")
+            add(f"{name}_count", timing["labels"], timing["count"])
+            add(f"{name}_sum", timing["labels"], timing["sum"])
+        for throughput in summary["throughputs"]:
+            name = f"{METRIC_PREFIX}{throughput['name']}"
+            declare(name, "gauge")
+            add(name, throughput["labels"], throughput["value"])
+
+        with atomic_write(path) as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_name", "_labels", "_start")
+
+    def __init__(self, metrics, name, labels):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.observe(self._name, time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+class NoopMetrics:
+    """Registry used while metrics are disabled; every method returns immediately."""
+
+    enabled = False
+    _timer = nullcontext()
+
+    def inc(self, name, value=1, **labels):
+        pass
+
+    def observe(self, name, seconds, **labels):
+        pass
+
+    def timer(self, name, **labels):
+        return self._timer
+
+    def summary(self):
+        return {"counters": [], "timings": [], "throughputs": []}
+
+
+_metrics = NoopMetrics()
+
+
+def configure_metrics(enabled=True):
+    """
+    Switches metrics collection on (with a fresh registry) or off.
+
+    :param enabled: Collect metrics.
+    :return: The active registry.
+    """
+    global _metrics
+    _metrics = Metrics() if enabled else NoopMetrics()
+    return _metrics
+
+
+def get_metrics():
+    """
+    Returns the active registry; a no-op one unless configure_metrics has enabled
+    collection. Hot paths can check its enabled attribute to skip computing values.
+
+    :return: Metrics or NoopMetrics.
+    """
+    return _metrics
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
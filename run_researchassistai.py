@@ -1,134 +1,390 @@
-from Phase1 import search_academic_sources
-from Phase2 import extract_key_information, summarize_text, generate_description
-from Phase3 import harmonize_data, ontology_mapping
+from Phase1 import search_academic_sources, normalize_doi, normalize_title, configure_http_client, WatchState
+from Phase2 import process_articles, SUMMARY_FAILED, DESCRIPTION_FAILED
+from Phase3 import harmonize_data, iter_harmonized, write_harmonized_dataset, HARMONIZE_CHUNK_SIZE, open_triple_store, is_persistent_store, upsert_articles, export_graph, close_triple_store
 from Phase4 import preprocess_image, extract_data_from_image
+from semantic_index import SemanticIndex
+from metrics import configure_metrics, PROMETHEUS_TEXTFILE
+from fileutils import atomic_write
 import pandas as pd
-import matplotlib.pyplot as plt
 import json
 import os
 import datetime
+import hashlib
 
+RUN_DIR = "processed_articles"
+DEFAULT_KEYWORDS = ["longevity", "mitochondrial", "aging", "protein folding", "autophagy", "bio multi-modal datasets", "machine learning"]
+PHASE2_STAGES = ("extracted", "summarized", "described")
+# Only fetch articles newer than the previous run's, e.g. for nightly runs over the same keywords
+WATCH_MODE = os.environ.get("RESEARCHASSISTAI_WATCH", "0") == "1"
 
-def main():
-    keywords = ["longevity", "mitochondrial", "aging", "protein folding", "autophagy", "bio multi-modal datasets", "machine learning"]
-    max_results = 5  # or whatever number you want
-
-    articles = search_academic_sources(keywords, max_results)
-
-    if not articles:
-        print("No articles found.")
-        return
-
-
-    # Display the articles retrieved for debugging and validation
-    print(f"Retrieved {len(articles)} articles from multiple sources.")
-    for i, article in enumerate(articles, 1):
-        print(f"Article {i}:")
-        print(f"Title: {article['title']}")
-        print(f"Abstract: {article['abstract'][:200]}...")  # Print a snippet of the abstract
-        print(f"Authors: {', '.join(article['authors'])}")
-        print(f"Journal: {article['journal']}")
-        print(f"DOI: {article['doi']}")
-        print(f"Source: {article['source']}\n")
-
-    # Phase 2: NLP for Information Extraction and Summarization
-    print("\n\n\n**Phase 2: NLP for Information Extraction and Summarization**\n\n\n")
-    summarized_articles = []
-
-    for index, article in enumerate(articles, start=1):
-        # Extract key information
-        key_info = extract_key_information(article['abstract'])
-        # Summarize the abstract
-        summary = summarize_text(article['abstract'])
-        # Generate descriptions using the extracted key information
-        generated_desc = generate_description(key_info['METHODS'], key_info['RESULTS'])
-        
-        # Create a citable format
-        citable_info = {
-            'authors': article.get('authors', []),
-            'year': article.get('year', ''),
-            'title': article['title'],
-            'journal': article.get('journal', 'N/A'),
-            'volume': article.get('volume', 'N/A'),
-            'issue': article.get('issue', 'N/A'),
-            'pages': article.get('pages', 'N/A'),
-            'doi': article.get('doi', 'N/A'),
-            'url': article.get('url', 'N/A'),
-            'publication_date': article.get('publication_date', 'N/A'),
-            'accessed_date': datetime.datetime.now().strftime("%Y-%m-%d")
-        }
-        
-        summarized_article = {
-            'title': article['title'],
-            'abstract': article['abstract'],
-            'summary': summary,
-            'extracted_info': key_info,
-            'generated_description': generated_desc,
-            'citation_info': citable_info,
-            'source': article.get('source', 'N/A')
-        }
-        
-        summarized_articles.append(summarized_article)
-
-        # Display summarized information for debugging
-        print(f"Summary for '{article['title']}':")
-        print(f"Abstract Summary: {summary}")
-        print(f"Generated Description: {generated_desc}")
-        print(f"Citation Info: {citable_info}\n")
-
-        # Save after every 5 articles or at the end
-        if index % 5 == 0 or index == len(articles):
-            # Ensure the directory exists
-            os.makedirs("processed_articles", exist_ok=True)
-            
-            # Save to a file using the index instead of 'id'
-            with open(f"processed_articles/articles_{index-4}_to_{index}.json", 'w') as f:
-                json.dump(summarized_articles, f, indent=2)
-            
-            print(f"Completed processing batch of articles (up to article {index})")
-            
-            # Clear the list for the next batch
-            summarized_articles = []
-
-
-
-    # Phase 3: Data Integration
-    print("\n\n\n**Phase 3: Data Integration**\n\n\n")
-    # Convert article data to pandas DataFrame format
-    df = pd.DataFrame(articles)
-    harmonized_df = harmonize_data([df])
-    rdf_graph = ontology_mapping(harmonized_df)
-
-    # Display harmonized data and RDF graph snippet
-    print("Harmonized Data Frame:")
-    print(harmonized_df.head())
-    print("\nRDF Graph (Turtle format):")
-    print(rdf_graph.serialize(format="turtle").decode("utf-8"))
-
-    # Phase 4: Image and Multimedia Analysis
-    print("\n\n\n**Phase 4: Image and Multimedia Analysis**\n\n\n")
-    image_path = "example_chart.png"  # Replace with actual path to your image
-    preprocessed_image = preprocess_image(image_path)
-
-    # Display preprocessed image for validation
-    plt.imshow(preprocessed_image, cmap='gray')
-    plt.title("Preprocessed Image")
-    plt.show()
-
-    # Extract text and data from the image
-    extracted_text = extract_data_from_image(preprocessed_image)
-    print("Extracted Text Data from Image:")
-    print(extracted_text)
-
-    # Phase 5: Natural Language Generation
-    print("\n\n\n**Phase 5: Natural Language Generation**\n\n\n")
-    # Using the descriptions generated in Phase 2 as the final output for simplicity
-    for article in summarized_articles:
-        print(f"Generated Description for '{article['title']}':")
-        print(article['generated_description'])
-        print("\n")
-
-    print("Pipeline execution completed.")
+
+def write_json_atomic(path, data):
+    """
+    Writes JSON to a temporary file next to path and renames it into place, so a crash
+    never leaves a half-written file behind.
+
+    :param path: Destination file path.
+    :param data: JSON-serializable data.
+    """
+    with atomic_write(path) as f:
+        json.dump(data, f, indent=2)
+
+
+def article_key(article):
+    """
+    Returns a stable identifier for an article, derived from its DOI or else its title.
+
+    :param article: Article metadata dict.
+    :return: Hex string usable as a file name.
+    """
+    doi = normalize_doi(article.get('doi'))
+    identity = f"doi:{doi}" if doi else f"title:{normalize_title(article.get('title'))}:{article.get('source')}"
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()[:16]
+
+
+class RunManifest:
+    """
+    Append-only journal of pipeline progress: which search job produced the article list,
+    whether the run over it finished, and which stages (searched, extracted, summarized,
+    described, stored, mapped) each article has completed or failed. Each event is one flushed JSON line, so a crash loses at most the
+    event being written, and replaying the journal restores the latest state.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the manifest journal (JSON lines).
+        """
+        self.path = path
+        self.search_job = None
+        self.finished = False
+        self.stages = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final line from a crash mid-write
+                        continue
+                    self._apply(event)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a")
+
+    def _apply(self, event):
+        if event.get("event") == "search":
+            self.search_job = event["job"]
+            self.finished = False
+        elif event.get("event") == "complete":
+            self.finished = True
+        elif event.get("event") == "stage":
+            self.stages.setdefault(event["article"], {})[event["stage"]] = event["status"]
+
+    def _write(self, event):
+        self._file.write(json.dumps(event) + "\n")
+        self._file.flush()
+        self._apply(event)
+
+    def record_search(self, job):
+        """
+        Records a completed search.
+
+        :param job: Search parameters (keywords and max_results).
+        """
+        self._write({"event": "search", "job": job, "time": datetime.datetime.now().isoformat()})
+
+    def record_complete(self):
+        """Records that the run over the current search job finished."""
+        self._write({"event": "complete", "time": datetime.datetime.now().isoformat()})
+
+    def record(self, key, stage, ok=True, error=None):
+        """
+        Records the outcome of a stage for an article.
+
+        :param key: Article key from article_key.
+        :param stage: Stage name.
+        :param ok: Whether the stage succeeded.
+        :param error: Optional error message for failed stages.
+        """
+        event = {"event": "stage", "article": key, "stage": stage, "status": "done" if ok else "failed"}
+        if error:
+            event["error"] = error
+        self._write(event)
+
+    def is_done(self, key, *stages):
+        """
+        :param key: Article key from article_key.
+        :param stages: Stage names to check.
+        :return: True if the article completed all given stages.
+        """
+        completed = self.stages.get(key, {})
+        return all(completed.get(stage) == "done" for stage in stages)
+
+    def close(self):
+        self._file.close()
+
+
+def process_article_result(result, manifest, checkpoint_path):
+    """
+    Builds the summarized article for one Phase 2 result, checkpoints it and records
+    the stage outcomes in the manifest. Failed model calls are recorded as failed stages
+    so the next run retries them.
+
+    :param result: (article, key_info, summary, description) tuple from process_articles.
+    :param manifest: RunManifest of the current run.
+    :param checkpoint_path: Path of the article's checkpoint file.
+    :return: Summarized article dict.
+    """
+    article, key_info, summary, generated_desc = result
+
+    # Create a citable format
+    citable_info = {
+        'authors': article.get('authors', []),
+        'year': article.get('year', ''),
+        'title': article['title'],
+        'journal': article.get('journal', 'N/A'),
+        'volume': article.get('volume', 'N/A'),
+        'issue': article.get('issue', 'N/A'),
+        'pages': article.get('pages', 'N/A'),
+        'doi': article.get('doi', 'N/A'),
+        'url': article.get('url', 'N/A'),
+        'publication_date': article.get('publication_date', 'N/A'),
+        'accessed_date': datetime.datetime.now().strftime("%Y-%m-%d")
+    }
+
+    summarized_article = {
+        'title': article['title'],
+        'abstract': article['abstract'],
+        'summary': summary,
+        'extracted_info': key_info,
+        'generated_description': generated_desc,
+        'citation_info': citable_info,
+        'source': article.get('source', 'N/A')
+    }
+
+    # Display summarized information for debugging
+    print(f"Summary for '{article['title']}':")
+    print(f"Abstract Summary: {summary}")
+    print(f"Generated Description: {generated_desc}")
+    print(f"Citation Info: {citable_info}\n")
+
+    write_json_atomic(checkpoint_path, summarized_article)
+    key = article_key(article)
+    manifest.record(key, "extracted")
+    manifest.record(key, "summarized", summary != SUMMARY_FAILED, summary if summary == SUMMARY_FAILED else None)
+    manifest.record(key, "described", generated_desc != DESCRIPTION_FAILED,
+                    generated_desc if generated_desc == DESCRIPTION_FAILED else None)
+    return summarized_article
+
+
+def main(keywords=None, max_results=5, run_dir=RUN_DIR, watch=WATCH_MODE):
+    """
+    Runs the pipeline, resuming from the run manifest in run_dir: a rerun of an unfinished
+    run with the same search parameters reuses the stored search results, skips articles
+    whose Phase 2 results are complete and retries only the failed ones. Once a run has
+    finished, the next one searches again.
+
+    :param keywords: Search keywords (defaults to DEFAULT_KEYWORDS).
+    :param max_results: Maximum number of articles per source and keyword.
+    :param run_dir: Directory holding the manifest, checkpoints and batch files.
+    :param watch: Incremental run: search only for articles newer than those of the last
+                  completed watch run, and carry over articles that failed Phase 2 then.
+    """
+    keywords = keywords or DEFAULT_KEYWORDS
+    metrics = configure_metrics()
+    try:
+        configure_http_client()  # fresh connection pools and retry budget for this run
+        manifest = RunManifest(os.path.join(run_dir, "manifest.jsonl"))
+        search_job = {"keywords": keywords, "max_results": max_results}
+        search_path = os.path.join(run_dir, "search_results.json")
+        watch_state = None
+        if watch:
+            watch_state = WatchState(os.path.join(run_dir, "watch_state.json"))
+            # The marks only move once a watch run has processed its articles, so a failed
+            # run resumes with its stored search results instead of searching again
+            search_job["watch_since"] = watch_state.updated
+
+        if manifest.search_job == search_job and not manifest.finished and os.path.exists(search_path):
+            with open(search_path) as f:
+                articles = json.load(f)
+            print(f"Resuming run: loaded {len(articles)} articles from {search_path}")
+        else:
+            articles = search_academic_sources(keywords, max_results, watch_state=watch_state)
+            if watch:
+                articles = [article for article in articles if not manifest.is_done(article_key(article), *PHASE2_STAGES)]
+                print(f"Watch mode: {len(articles)} new articles since {watch_state.updated or 'the first run'}")
+                if os.path.exists(search_path):
+                    # Articles of the previous run that didn't finish Phase 2 are retried
+                    with open(search_path) as f:
+                        previous = json.load(f)
+                    new_keys = {article_key(article) for article in articles}
+                    articles = [
+                        article for article in previous
+                        if article_key(article) not in new_keys
+                        and not manifest.is_done(article_key(article), *PHASE2_STAGES)
+                    ] + articles
+            write_json_atomic(search_path, articles)
+            manifest.record_search(search_job)
+            for article in articles:
+                manifest.record(article_key(article), "searched")
+
+        if not articles:
+            print("No articles found.")
+            if watch_state is not None:
+                watch_state.save()
+            manifest.record_complete()
+            manifest.close()
+            return
+
+
+        # Display the articles retrieved for debugging and validation
+        print(f"Retrieved {len(articles)} articles from multiple sources.")
+        for i, article in enumerate(articles, 1):
+            print(f"Article {i}:")
+            print(f"Title: {article['title']}")
+            print(f"Abstract: {article['abstract'][:200]}...")  # Print a snippet of the abstract
+            print(f"Authors: {', '.join(article['authors'])}")
+            print(f"Journal: {article['journal']}")
+            print(f"DOI: {article['doi']}")
+            print(f"Source: {article['source']}\n")
+
+        # Phase 2: NLP for Information Extraction and Summarization
+        print("\n\n\n**Phase 2: NLP for Information Extraction and Summarization**\n\n\n")
+        summarized_articles = []
+        checkpoint_dir = os.path.join(run_dir, "articles")
+
+        # Articles whose Phase 2 results are all checkpointed are loaded instead of reprocessed
+        def checkpoint_path(article):
+            return os.path.join(checkpoint_dir, f"{article_key(article)}.json")
+
+        complete = [
+            manifest.is_done(article_key(article), *PHASE2_STAGES) and os.path.exists(checkpoint_path(article))
+            for article in articles
+        ]
+
+        # Extract key information, summarize the abstract and generate descriptions, with the
+        # LLM calls of several articles in flight at once; results arrive in article order
+        processed = process_articles(article for article, done in zip(articles, complete) if not done)
+
+        for index, (article, done) in enumerate(zip(articles, complete), start=1):
+            if done:
+                with open(checkpoint_path(article)) as f:
+                    summarized_articles.append(json.load(f))
+                print(f"Skipping '{article['title']}': already processed")
+            else:
+                summarized_articles.append(process_article_result(next(processed), manifest, checkpoint_path(article)))
+
+            # Save after every 5 articles or at the end
+            if index % 5 == 0 or index == len(articles):
+                # Save to a file using the index instead of 'id'
+                batch_start = index - len(summarized_articles) + 1
+                write_json_atomic(os.path.join(run_dir, f"articles_{batch_start}_to_{index}.json"), summarized_articles)
+
+                print(f"Completed processing batch of articles (up to article {index})")
+
+                # Clear the list for the next batch
+                summarized_articles = []
+
+        processed.close()
+        if watch_state is not None:
+            watch_state.save()
+
+        # Index summarized articles for semantic search; the index skips keys it already has
+        semantic_index = SemanticIndex()
+        indexed = semantic_index.keys()
+        pending = [
+            article for article in articles
+            if article_key(article) not in indexed and manifest.is_done(article_key(article), "summarized")
+        ]
+        to_index = []
+        for article in pending:
+            with open(checkpoint_path(article)) as f:
+                to_index.append(json.load(f))
+        added = semantic_index.add(to_index, keys=[article_key(article) for article in pending])
+        print(f"Semantic index: {added} articles added ({len(semantic_index)} indexed)")
+
+        # Phase 3: Data Integration
+        print("\n\n\n**Phase 3: Data Integration**\n\n\n")
+        # Convert article data to pandas DataFrame format
+        df = pd.DataFrame(articles)
+        harmonized_df = harmonize_data([df])
+
+        # Append articles not stored by earlier runs to the Parquet dataset, partitioned by
+        # source; each chunk is recorded in the manifest once its files are written
+        dataset_path = os.path.join(run_dir, "harmonized")
+        unstored = [article for article in articles if not manifest.is_done(article_key(article), "stored")]
+        try:
+            row_count = 0
+            chunks = iter_harmonized([pd.DataFrame(unstored)], HARMONIZE_CHUNK_SIZE)
+            for start, chunk in zip(range(0, len(unstored), HARMONIZE_CHUNK_SIZE), chunks):
+                row_count += write_harmonized_dataset(chunk, dataset_path)
+                for article in unstored[start:start + HARMONIZE_CHUNK_SIZE]:
+                    manifest.record(article_key(article), "stored")
+            print(f"Harmonized dataset: {row_count} new articles appended to {dataset_path}")
+        except ImportError as e:
+            print(f"Harmonized dataset not written, pyarrow is required ({e})")
+
+        # Upsert articles into the persistent knowledge graph; articles mapped by earlier
+        # runs are already in it unless the store had to fall back to memory
+        rdf_graph = open_triple_store()
+        persistent = is_persistent_store(rdf_graph)
+        unmapped = [not (persistent and manifest.is_done(article_key(article), "mapped")) for article in articles]
+        upsert_articles(rdf_graph, harmonized_df[unmapped])
+        for article, mapped_now in zip(articles, unmapped):
+            if mapped_now:
+                manifest.record(article_key(article), "mapped")
+
+        # Display harmonized data and export the RDF graph
+        print("Harmonized Data Frame:")
+        print(harmonized_df.head())
+        graph_path = os.path.join(run_dir, "knowledge_graph.nt")
+        triple_count = export_graph(rdf_graph, graph_path)
+        close_triple_store(rdf_graph)
+        print(f"\nRDF Graph: {triple_count} triples exported to {graph_path} (N-Triples)")
+
+        # Every article's results are stored, so the next run searches again; the demo
+        # phases below don't affect what a rerun would redo
+        manifest.record_complete()
+
+        # Phase 4: Image and Multimedia Analysis
+        print("\n\n\n**Phase 4: Image and Multimedia Analysis**\n\n\n")
+        image_path = "example_chart.png"  # Replace with actual path to your image
+        try:
+            # Timed like each image of a batch OCR run
+            with metrics.timer("ocr_image_seconds", cached=False):
+                preprocessed_image = preprocess_image(image_path)
+
+                # Extract text and data from the image
+                extracted_text = extract_data_from_image(preprocessed_image)
+
+            # Display preprocessed image for validation
+            import matplotlib.pyplot as plt
+            plt.imshow(preprocessed_image, cmap='gray')
+            plt.title("Preprocessed Image")
+            plt.show()
+
+            print("Extracted Text Data from Image:")
+            print(extracted_text)
+        except Exception as e:
+            metrics.inc("ocr_errors")
+            print(f"Image analysis skipped: {e}")
+
+        # Phase 5: Natural Language Generation
+        print("\n\n\n**Phase 5: Natural Language Generation**\n\n\n")
+        # Using the descriptions generated in Phase 2 as the final output for simplicity
+        for article in summarized_articles:
+            print(f"Generated Description for '{article['title']}':")
+            print(article['generated_description'])
+            print("\n")
+
+        manifest.close()
+        print("Pipeline execution completed.")
+    finally:
+        # Export the run's performance metrics, also when the run stops early or fails
+        metrics_path = os.path.join(run_dir, "metrics.json")
+        metrics.write_json(metrics_path)
+        if PROMETHEUS_TEXTFILE:
+            metrics.write_prometheus(PROMETHEUS_TEXTFILE)
+        print(f"Metrics written to {metrics_path}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
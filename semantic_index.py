@@ -0,0 +1,296 @@
+import numpy as np
+import functools
+import json
+import os
+import re
+import zlib
+from fileutils import atomic_write
+
+# Semantic index parameters
+SEMANTIC_INDEX_PATH = "semantic_index"
+EMBEDDING_MODEL = os.environ.get("RESEARCHASSISTAI_EMBEDDING_MODEL", "all-MiniLM-L6-v2")  # "" for hashing only
+HASHING_DIM = 256  # 1M articles take 1 GB at this width
+EMBED_BATCH_SIZE = 1024  # texts embedded per batch when indexing
+SEARCH_BLOCK_ROWS = 1 << 18  # rows scored per matrix product when searching
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+
+class HashingEmbedder:
+    """
+    Offline vectorizer: word unigrams and bigrams are hashed into a fixed number of
+    signed buckets, term counts are damped with log1p and vectors are L2-normalized,
+    so cosine similarity is a dot product. Needs no vocabulary, so vectors never change
+    as the corpus grows.
+    """
+
+    def __init__(self, dim=HASHING_DIM):
+        """
+        :param dim: Number of hash buckets (vector width).
+        """
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        """
+        :param texts: List of strings.
+        :return: float32 array of shape (len(texts), dim).
+        """
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall((text or "").lower())
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                h = _feature_hash(feature)
+                rows.append(row)
+                cols.append(h % self.dim)
+                signs.append(1.0 if h & 0x80000000 else -1.0)
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), np.array(signs, dtype=np.float32))
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model; only loaded from files already on disk."""
+
+    def __init__(self, model_name=EMBEDDING_MODEL):
+        """
+        :param model_name: sentence-transformers model name or path.
+        """
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, local_files_only=True)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers:{model_name}"
+
+    def embed(self, texts):
+        """
+        :param texts: List of strings.
+        :return: float32 array of shape (len(texts), dim).
+        """
+        vectors = self.model.encode([text or "" for text in texts], batch_size=64, convert_to_numpy=True)
+        return _normalize(vectors.astype(np.float32, copy=False))
+
+
+@functools.lru_cache(maxsize=1 << 20)
+def _feature_hash(feature):
+    # crc32 rather than hash(), which is salted per process
+    return zlib.crc32(feature.encode("utf-8"))
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def get_embedder(name=None):
+    """
+    Returns the embedder an index should use: the local embedding model if it is
+    installed and downloaded, otherwise the hashing vectorizer.
+
+    :param name: Embedder name stored in an existing index, or None for a new index.
+    :return: Embedder with name, dim and embed(texts).
+    """
+    if name is not None:
+        if name.startswith("hashing-"):
+            return HashingEmbedder(int(name.split("-", 1)[1]))
+        # An index must be queried with the model that built it
+        return SentenceTransformerEmbedder(name.split(":", 1)[1])
+
+    if EMBEDDING_MODEL:
+        try:
+            return SentenceTransformerEmbedder(EMBEDDING_MODEL)
+        except Exception as e:
+            print(f"Embedding model {EMBEDDING_MODEL} unavailable ({e}); using the hashing vectorizer")
+    return HashingEmbedder()
+
+
+def article_text(article):
+    """
+    :param article: Article or summarized article dict.
+    :return: The text embedded for the article: title, abstract and summary.
+    """
+    parts = [article.get("title"), article.get("abstract"), article.get("summary")]
+    return "\n".join(part for part in parts if isinstance(part, str) and part and part != "N/A")
+
+
+def _article_record(article, key):
+    """Metadata stored for an indexed article."""
+    doi = article.get("doi", article.get("citation_info", {}).get("doi"))
+    return {"key": key, "title": article.get("title"), "doi": doi, "source": article.get("source")}
+
+
+class SemanticIndex:
+    """
+    Append-only vector index of articles. Vectors live in a raw float32 file that is
+    memory-mapped for search, with one JSON line of metadata per row and an offsets
+    file to seek to it, so a query only reads the metadata of its results. A small
+    header file records how many rows are complete, so a crash mid-append is rolled
+    back on the next open. Queries are exact cosine top-k via blocked matrix products.
+    """
+
+    def __init__(self, path=SEMANTIC_INDEX_PATH, embedder=None):
+        """
+        :param path: Index directory, created on first use.
+        :param embedder: Embedder for a new index (defaults to get_embedder()); an
+                         existing index always uses the embedder it was built with.
+        """
+        self.path = path
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._meta_path = os.path.join(path, "meta.jsonl")
+        self._offsets_path = os.path.join(path, "offsets.i64")
+        self._header_path = os.path.join(path, "index.json")
+        self._matrix = None
+        self._offsets = None
+        self._keys = None
+
+        if os.path.exists(self._header_path):
+            with open(self._header_path) as f:
+                self._header = json.load(f)
+            if embedder is not None and embedder.name != self._header["embedder"]:
+                raise ValueError(f"Index at {path} was built with {self._header['embedder']}, not {embedder.name}")
+            self.embedder = embedder or get_embedder(self._header["embedder"])
+            self._rollback()
+        else:
+            self.embedder = embedder or get_embedder()
+            self._header = {"embedder": self.embedder.name, "dim": self.embedder.dim, "count": 0, "meta_bytes": 0}
+
+        self.dim = self._header["dim"]
+
+    def __len__(self):
+        return self._header["count"]
+
+    def _rollback(self):
+        # Drop rows appended after the last header update
+        count = self._header["count"]
+        for file_path, size in ((self._vectors_path, count * self._header["dim"] * 4),
+                                (self._offsets_path, count * 8),
+                                (self._meta_path, self._header["meta_bytes"])):
+            if os.path.exists(file_path) and os.path.getsize(file_path) > size:
+                os.truncate(file_path, size)
+
+    def _write_header(self):
+        with atomic_write(self._header_path) as f:
+            json.dump(self._header, f)
+
+    def record(self, row):
+        """
+        :param row: Row number.
+        :return: Metadata dict of the article at that row.
+        """
+        if self._offsets is None:
+            self._offsets = np.fromfile(self._offsets_path, dtype=np.int64, count=len(self))
+        with open(self._meta_path, "rb") as f:
+            f.seek(int(self._offsets[row]))
+            return json.loads(f.readline())
+
+    def keys(self):
+        """
+        :return: Set of keys of the indexed articles.
+        """
+        if self._keys is None:
+            self._keys = set()
+            if len(self):
+                with open(self._meta_path, encoding="utf-8") as f:
+                    for line, _ in zip(f, range(len(self))):
+                        key = json.loads(line)["key"]
+                        if key is not None:
+                            self._keys.add(key)
+        return self._keys
+
+    def add(self, articles, keys=None, batch_size=EMBED_BATCH_SIZE):
+        """
+        Embeds and appends articles. Articles whose key is already indexed are skipped.
+
+        :param articles: List of article or summarized article dicts.
+        :param keys: Optional stable identifiers, one per article.
+        :param batch_size: Number of articles embedded per batch.
+        :return: Number of articles added.
+        """
+        keys = list(keys) if keys is not None else [None] * len(articles)
+        indexed = self.keys()
+        pending = []
+        for article, key in zip(articles, keys):
+            if key is None or key not in indexed:
+                pending.append((article, key))
+                if key is not None:
+                    indexed.add(key)
+        if not pending:
+            return 0
+
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._vectors_path, "ab") as vectors_file, open(self._meta_path, "ab") as meta_file, \
+                open(self._offsets_path, "ab") as offsets_file:
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                vectors = self.embedder.embed([article_text(article) for article, _ in batch])
+                vectors_file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+
+                lines = [(json.dumps(_article_record(article, key)) + "\n").encode("utf-8") for article, key in batch]
+                offsets = self._header["meta_bytes"] + np.cumsum([0] + [len(line) for line in lines[:-1]], dtype=np.int64)
+                offsets_file.write(offsets.tobytes())
+                meta_file.write(b"".join(lines))
+                for f in (vectors_file, offsets_file, meta_file):
+                    f.flush()
+
+                # Commit the batch: rows beyond the header's count are ignored on open
+                self._header["count"] += len(batch)
+                self._header["meta_bytes"] += sum(len(line) for line in lines)
+                self._write_header()
+
+        self._matrix = None
+        self._offsets = None
+        return len(pending)
+
+    def _vectors(self):
+        if self._matrix is None:
+            if len(self) == 0:
+                return np.zeros((0, self.dim), dtype=np.float32)
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(len(self), self.dim))
+        return self._matrix
+
+    def search(self, query, k=10):
+        """
+        Finds the articles most similar to a query.
+
+        :param query: Query text.
+        :param k: Number of results.
+        :return: List of metadata dicts with a 'score' key, best match first.
+        """
+        return self.search_batch([query], k)[0]
+
+    def search_batch(self, queries, k=10):
+        """
+        Finds the articles most similar to each of several queries; batching queries
+        scores them all in one pass over the matrix.
+
+        :param queries: List of query texts.
+        :param k: Number of results per query.
+        :return: One result list per query, as returned by search.
+        """
+        matrix = self._vectors()
+        k = min(k, len(matrix))
+        if k <= 0 or not queries:
+            return [[] for _ in queries]
+        query_vectors = self.embedder.embed(queries)
+
+        # Keep each block's top k, then pick the overall top k among those candidates
+        candidate_rows, candidate_scores = [], []
+        for start in range(0, len(matrix), SEARCH_BLOCK_ROWS):
+            scores = query_vectors @ matrix[start:start + SEARCH_BLOCK_ROWS].T
+            block_k = min(k, scores.shape[1])
+            top = np.argpartition(-scores, block_k - 1, axis=1)[:, :block_k]
+            candidate_rows.append(top + start)
+            candidate_scores.append(np.take_along_axis(scores, top, axis=1))
+        rows = np.concatenate(candidate_rows, axis=1)
+        scores = np.concatenate(candidate_scores, axis=1)
+        order = np.argsort(-scores, axis=1)[:, :k]
+        rows = np.take_along_axis(rows, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+
+        return [
+            [{**self.record(row), "score": float(score)} for row, score in zip(query_rows, query_scores)]
+            for query_rows, query_scores in zip(rows, scores)
+        ]
@@ -0,0 +1,59 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Phase1 import deduplicate_articles
+
+
+def _article(title, doi="N/A", source="PubMed"):
+    return {"title": title, "doi": doi, "source": source, "abstract": "N/A"}
+
+
+def _titles(articles):
+    return sorted(article["title"] for article in articles)
+
+
+def test_reformatted_titles_merge():
+    articles = [_article("Rapamycin extends lifespan in aged mice"),
+                _article("RAPAMYCIN EXTENDS LIFESPAN IN AGED MICE.", source="CrossRef"),
+                _article("Rapamycin extends life-span in aged mice", source="arXiv")]
+    merged = deduplicate_articles(articles)
+    assert len(merged) == 1
+    assert merged[0]["sources"] == ["PubMed", "CrossRef", "arXiv"]
+
+
+def test_numbered_parts_and_phases_stay_apart():
+    articles = [_article("Mitochondrial dysfunction in aging: Part I"),
+                _article("Mitochondrial dysfunction in aging: Part II"),
+                _article("A phase 2 trial of metformin in older adults with prediabetes"),
+                _article("A phase 3 trial of metformin in older adults with prediabetes")]
+    assert len(deduplicate_articles(articles)) == 4
+
+
+def test_numbered_series_does_not_collapse():
+    articles = [_article(f"Effects of rapamycin on lifespan in mice cohort {n}") for n in range(200)]
+    assert len(deduplicate_articles(articles)) == 200
+
+
+def test_near_duplicates_do_not_chain():
+    # Each title is near-identical to its neighbours but not to titles two steps away
+    first = "Long term caloric restriction delays immune system aging and chronic inflammation in old rhesus monkeys"
+    second = first.replace("old", "aged")
+    third = second.replace("chronic ", "").replace("caloric", "calorie")
+    merged = deduplicate_articles([_article(first), _article(second), _article(third)])
+    assert _titles(merged) == sorted([first, third])
+
+
+def test_different_identifiers_stay_apart():
+    articles = [_article("Senolytics improve physical function in aged mice", doi="10.1000/a"),
+                _article("Senolytics improve physical function in aged mice.", doi="10.1000/b")]
+    assert len(deduplicate_articles(articles)) == 2
+
+
+def test_arxiv_versions_and_doi_merge():
+    articles = [_article("Aging clocks from single-cell data", doi="http://arxiv.org/abs/2401.01234v1", source="arXiv"),
+                _article("Aging clocks from single cell data", doi="https://doi.org/10.48550/arXiv.2401.01234",
+                         source="CrossRef"),
+                _article("Aging clocks from single-cell data", doi="http://arxiv.org/abs/2401.01235v2", source="arXiv")]
+    assert len(deduplicate_articles(articles)) == 2